@@ -1,21 +1,25 @@
 import streamlit as st
 import pandas as pd
+import io
 import json
 import os
+import time
 from baselinker_api import (
-    get_inventory_products_list,
-    get_inventory_products_data,
+    fetch_inventory_products_data,
     update_product_extra_field,
+    BaselinkerAPIError,
     INVENTORY_ID,
     TARGET_PRODUCT_ID,
     EXTRA_FIELD_1_ID,
     EXTRA_FIELD_2_ID
 )
-from google_sheets_helper import (
-    get_products_from_sheet,
-    update_product_from_sheet,
-    update_sheet_with_product_data
-)
+from settings import APP_INCREMENTAL_SYNC, PRODUCT_CACHE_MAX_AGE, PRODUCT_TABLE_FIELDS
+from product_store import get_default_store, load_inventory_products
+from sync_engine import SyncEngine
+from jobs import get_job_runner
+from metrics import registry as metrics_registry
+from inventory_cache import get_inventory_cache
+from product_table import ProductTable
 
 st.set_page_config(page_title="Baselinker Products", layout="wide")
 
@@ -24,70 +28,162 @@ if 'products_data' not in st.session_state:
     st.session_state.products_data = None
 if 'df' not in st.session_state:
     st.session_state.df = None
+if 'inventory_version' not in st.session_state:
+    st.session_state.inventory_version = 0
 if 'spreadsheet_url' not in st.session_state:
     st.session_state.spreadsheet_url = ""
+if 'metrics_baseline' not in st.session_state:
+    st.session_state.metrics_baseline = metrics_registry.snapshot()
+if 'jobs' not in st.session_state:
+    # Slot name to the ID of the latest background job this session started there
+    st.session_state.jobs = {}
 
 # Sidebar for navigation
 st.sidebar.title("Navigation")
-page = st.sidebar.radio("Go to", ["Baselinker Products", "Google Sheets Integration"])
+page = st.sidebar.radio("Go to", ["Baselinker Products", "Google Sheets Integration", "Diagnostics"])
 
-# Function to load products data
-def load_products_data():
-    products_list = get_inventory_products_list(INVENTORY_ID)
+# Function to start a background job and remember it for this session
+def start_job(slot, key, func, name):
+    # An identical job that is already queued or running is joined instead of started again
+    job = get_job_runner().submit(key, func, name)
+    st.session_state.jobs[slot] = job.id
+    return job
+
+# Function to get the state of this session's latest job in a slot
+def session_job(slot):
+    job_id = st.session_state.jobs.get(slot)
+    job = get_job_runner().get(job_id) if job_id is not None else None
+    return job.snapshot() if job is not None else None
+
+# Poll a running job and rerun the whole page once it has finished
+@st.fragment(run_every=1.0)
+def show_job_progress(slot):
+    job = session_job(slot)
+    if job is None or job["status"] not in ("QUEUED", "RUNNING"):
+        st.rerun()
     
-    if "status" in products_list and products_list["status"] == "SUCCESS":
-        product_ids = []
-        if "products" in products_list:
-            if isinstance(products_list["products"], list):
-                product_ids = [product["id"] for product in products_list["products"]]
-            elif isinstance(products_list["products"], dict):
-                product_ids = list(products_list["products"].keys())
-        
-        if not product_ids and TARGET_PRODUCT_ID:
-            product_ids = [TARGET_PRODUCT_ID]
+    if job["status"] == "QUEUED":
+        st.info(f"{job['name']}: waiting for a free worker")
+        return
+    
+    text = f"{job['name']}: {job['message']}" if job["message"] else job["name"]
+    if job["eta"] is not None:
+        text += f" (about {job['eta']:.0f}s left)"
+    st.progress(job["progress"] or 0.0, text=text)
 
-        products_data = get_inventory_products_data(INVENTORY_ID, product_ids)
+# Background job syncing the inventory into the product store and reloading the shared table
+def load_inventory_job(job, max_age):
+    store = get_default_store()
+    cache = get_inventory_cache()
+    synced_at = store.last_synced(INVENTORY_ID)
+    stale = synced_at is None or (max_age is not None and time.time() - synced_at > max_age)
+    sync_result = None
+    if APP_INCREMENTAL_SYNC and stale and max_age != 0 and store.log_mark(INVENTORY_ID) is not None:
+        # Fetch only what the change log lists since the last refresh; the sync button still forces a full sync
+        job.update(message="reading the product change log")
+        sync_result = store.refresh(INVENTORY_ID)
+        if sync_result["error"] is None:
+            stale = False
+            if not sync_result["full"] and cache.apply_changes(INVENTORY_ID, sync_result["products"], sync_result["deleted"]):
+                return sync_result
+        # A rejected change log read falls through to the full sync
+    if stale:
+        def progress(snapshot):
+            state = snapshot[INVENTORY_ID]
+            if state["chunks_total"]:
+                job.update(
+                    progress=state["chunks_done"] / state["chunks_total"],
+                    message=f"fetched {state['chunks_done']} of {state['chunks_total']} changed product chunks"
+                )
+            else:
+                job.update(message=f"listed {state['products_listed']} products")
         
-        if "status" in products_data and products_data["status"] == "SUCCESS":
+        sync_result = SyncEngine(store).run([INVENTORY_ID], progress=progress)[INVENTORY_ID]
+        if sync_result["status"] == "ERROR" and sync_result["error"] is not None:
+            raise BaselinkerAPIError("getInventoryProductsList", sync_result["error"])
+    
+    job.update(message="building the product table")
+    cache.invalidate(INVENTORY_ID)
+    products_data = cache.get(INVENTORY_ID, max_age=None)
+    if not len(products_data["table"]) and TARGET_PRODUCT_ID:
+        # Nothing synced yet, show at least the target product; cached so reruns don't refetch it
+        job.update(message=f"fetching product {TARGET_PRODUCT_ID}")
+        products_data = fetch_inventory_products_data(INVENTORY_ID, [TARGET_PRODUCT_ID])
+        if products_data["status"] == "ERROR":
+            raise BaselinkerAPIError("getInventoryProductsData", products_data["failed_chunks"][0]["error"])
+        products_data["table"] = ProductTable.from_products(products_data.pop("products"), release=True)
+        cache.put(INVENTORY_ID, products_data)
+    return sync_result
+
+# Function to load products data
+def load_products_data(max_age=PRODUCT_CACHE_MAX_AGE):
+    # The inventory is shared by every session and (re)loaded by one background job at a time;
+    # until it finishes the session keeps showing the copy it has
+    cache = get_inventory_cache()
+    products_data, stale = cache.peek(INVENTORY_ID, max_age)
+    if stale:
+        job = session_job("inventory")
+        # Don't retry a failed load on every rerun, the sidebar button retries it
+        if max_age == 0 or job is None or job["status"] != "FAILED":
+            start_job("inventory", ("inventory", INVENTORY_ID),
+                      lambda job: load_inventory_job(job, max_age), "Loading inventory")
+    if products_data is None:
+        return False
+
+    for failed_chunk in products_data["failed_chunks"]:
+        st.warning(f"Failed to get data for {len(failed_chunk['product_ids'])} products: {failed_chunk['error']}")
+
+    if products_data["status"] != "ERROR":
+        # Pick up the shared table only when the inventory was reloaded or patched
+        version = cache.version(INVENTORY_ID)
+        if st.session_state.products_data is not products_data or st.session_state.inventory_version != version:
             st.session_state.products_data = products_data
+            st.session_state.inventory_version = version
             prepare_dataframe()
-            return True
-        else:
-            st.error(f"Failed to get product data: {products_data}")
-            return False
+        return True
     else:
-        st.error(f"Failed to get products list: {products_list}")
+        st.error(f"Failed to get product data: {products_data}")
         return False
 
+# Function to apply a successful write to the product store and the shared table,
+# safe to call from background jobs
+def store_product_update(product_id, text_fields):
+    get_default_store().update_text_fields(INVENTORY_ID, product_id, text_fields)
+    return get_inventory_cache().patch_text_fields(INVENTORY_ID, product_id, text_fields)
+
+# Function to apply a write made by this session
+def apply_product_update(product_id, text_fields):
+    if store_product_update(product_id, text_fields):
+        # The patched table is the one this session displays, so no rebuild is needed
+        st.session_state.inventory_version = get_inventory_cache().version(INVENTORY_ID)
+
 # Function to prepare DataFrame
 def prepare_dataframe():
     if st.session_state.products_data is None:
         return
     
-    table_data = []
-    for product_id, product in st.session_state.products_data["products"].items():
-        # Flatten the product data for tabular display
-        product_info = {
-            "ID": product_id,
-            "SKU": product.get("sku", ""),
-            "EAN": product.get("ean", ""),
-            "Name": product.get("text_fields", {}).get("name", ""),
-            "Extra Field 467": product.get("text_fields", {}).get("extra_field_467", ""),
-            "Extra Field 484": product.get("text_fields", {}).get("extra_field_484", ""),
-            "Description Extra 1": product.get("text_fields", {}).get("description_extra1", ""),
-            "Description Extra 2": product.get("text_fields", {}).get("description_extra2", "")
-        }
-        table_data.append(product_info)
-    
-    # Create DataFrame
-    st.session_state.df = pd.DataFrame(table_data)
+    # The table is built column-wise when the inventory is loaded and shared by every session
+    st.session_state.df = st.session_state.products_data["table"].df
+
+# Force a sync with Baselinker regardless of the cache age
+if st.sidebar.button("Sync with Baselinker"):
+    load_products_data(max_age=0)
+
+# Load products data, which is cheap once another session has loaded it
+load_products_data()
 
-# Load products data if not already loaded
-if st.session_state.products_data is None:
-    load_products_data()
+inventory_job = session_job("inventory")
+if inventory_job is not None and inventory_job["status"] == "FAILED":
+    st.error(f"Failed to load products: {inventory_job['error']}")
+elif inventory_job is not None and inventory_job["status"] == "DONE" and inventory_job["result"]:
+    for failed_chunk in inventory_job["result"]["failed_chunks"]:
+        st.warning(f"Failed to get data for {len(failed_chunk['product_ids'])} products: {failed_chunk['error']}")
 
 # Baselinker Products Page
 if page == "Baselinker Products":
+    if inventory_job is not None and inventory_job["status"] in ("QUEUED", "RUNNING"):
+        show_job_progress("inventory")
+    
     if st.session_state.df is not None:
         # Display products table
         st.header("Products in Inventory")
@@ -97,27 +193,99 @@ if page == "Baselinker Products":
         uploaded_file = st.file_uploader("Upload CSV or XLS file", type=["csv", "xls", "xlsx"])
 
         if uploaded_file is not None:
+            # The importer and its spreadsheet readers are only loaded once a file is uploaded
+            from importer import read_chunks, import_file
+            
             try:
-                if uploaded_file.name.endswith(".csv"):
-                    uploaded_data = pd.read_csv(uploaded_file)
-                else:
-                    uploaded_data = pd.read_excel(uploaded_file)
+                # Only the first rows are read for the preview
+                preview = next(read_chunks(uploaded_file, uploaded_file.name, 20), pd.DataFrame())
+                uploaded_file.seek(0)
+                
+                st.write("Uploaded Data (first rows):")
+                st.dataframe(preview)
+                
+                columns = list(preview.columns)
+                id_column = st.selectbox("Product ID column", columns, index=columns.index("ID") if "ID" in columns else 0)
                 
-                st.write("Uploaded Data:")
-                st.dataframe(uploaded_data)
+                # Columns named like a text field column of the product table are imported into that field,
+                # any other column is taken to be named after the field ID itself
+                field_ids = {
+                    column: path.split(".", 1)[1]
+                    for column, path in PRODUCT_TABLE_FIELDS.items()
+                    if path.startswith("text_fields.")
+                }
+                import_columns = st.multiselect(
+                    "Columns to import",
+                    [column for column in columns if column != id_column],
+                    default=[column for column in columns if column != id_column and column in field_ids]
+                )
+                import_dry_run = st.checkbox("Dry run (only report what would change)", value=True, key="import_dry_run")
+                
+                if st.button("Import into Baselinker"):
+                    if import_columns:
+                        # The job reads its own copy, the upload may be gone by the time it runs
+                        file_data = uploaded_file.getvalue()
+                        filename = uploaded_file.name
+                        column_map = {column: field_ids.get(column, column) for column in import_columns}
+                        
+                        def import_job(job):
+                            file = io.BytesIO(file_data)
+                            
+                            def progress(summary):
+                                job.update(
+                                    progress=file.tell() / max(1, len(file_data)),
+                                    message=f"{summary['rows']} rows processed ({summary['rows_per_second']:.0f} rows/s)",
+                                    partial=dict(summary)
+                                )
+                            
+                            return import_file(
+                                file,
+                                filename,
+                                INVENTORY_ID,
+                                column_map,
+                                load_inventory_products(INVENTORY_ID, max_age=None)["products"],
+                                id_column=id_column,
+                                progress=progress,
+                                on_update=store_product_update,
+                                dry_run=import_dry_run
+                            )
+                        
+                        start_job(
+                            "import",
+                            ("import", filename, len(file_data), id_column, tuple(sorted(column_map.items())), import_dry_run),
+                            import_job,
+                            f"Importing {filename}"
+                        )
+                    else:
+                        st.warning("Please select at least one column to import.")
             except Exception as e:
                 st.error(f"Error reading file: {e}")
         
+        import_job_state = session_job("import")
+        if import_job_state is not None:
+            summary = import_job_state["result"] or import_job_state["partial"]
+            if import_job_state["status"] in ("QUEUED", "RUNNING"):
+                show_job_progress("import")
+            elif import_job_state["status"] == "FAILED":
+                st.error(f"Import failed: {import_job_state['error']}")
+            if summary is not None:
+                summary_text = (
+                    f"Processed {summary['rows']} rows in {summary['elapsed']:.1f}s: "
+                    f"{summary['updated']} changed, {summary['unchanged']} unchanged, {summary['failed']} failed, "
+                    f"{summary['invalid']} invalid, {summary['not_found']} not found, {summary['duplicate']} duplicates"
+                )
+                if import_job_state["status"] == "DONE":
+                    st.success(summary_text)
+                    with open(summary["report_path"], "rb") as report_file:
+                        st.download_button("Download import report", report_file, file_name="import_report.csv", mime="text/csv")
+                else:
+                    st.write(summary_text)
+        
         # Update section
         st.header(f"Update Extra Field 484 for Product ID: {TARGET_PRODUCT_ID}")
         
         # Get current value for the target product
-        current_value = ""
-        target_row = st.session_state.df[st.session_state.df["ID"] == TARGET_PRODUCT_ID]
-        if not target_row.empty and "Extra Field 484" in target_row.columns:
-            current_value = target_row.iloc[0]["Extra Field 484"]
-        else:
-            current_value = "N/A"
+        current_value = st.session_state.products_data["table"].value(TARGET_PRODUCT_ID, "Extra Field 484", "N/A")
         st.write(f"Current value: {current_value}")
         
         # Input for new value
@@ -137,18 +305,25 @@ if page == "Baselinker Products":
                     st.success(f"Successfully updated product ID {TARGET_PRODUCT_ID} with new Extra Field 484 value: {new_value}")
                     st.info("Refresh the page to see the updated value.")
                     
-                    # Reload products data
-                    load_products_data()
+                    # Patch the cached product instead of reloading the inventory
+                    apply_product_update(TARGET_PRODUCT_ID, {EXTRA_FIELD_2_ID: new_value})
                 else:
                     st.error(f"Failed to update product: {update_result}")
             else:
                 st.warning("Please enter a value to update.")
-    else:
+    elif inventory_job is None or inventory_job["status"] != "FAILED":
         st.info("Loading products data...")
-        load_products_data()
 
 # Google Sheets Integration Page
 elif page == "Google Sheets Integration":
+    # gspread and the Google auth libraries are only loaded when this page is opened
+    from google_sheets_helper import (
+        get_products_from_sheet,
+        update_product_from_sheet,
+        export_products_to_sheet,
+        reconcile_sheet_with_inventory
+    )
+    
     st.header("Google Sheets Integration")
     
     # Check for credentials file
@@ -193,57 +368,198 @@ elif page == "Google Sheets Integration":
             # Button to load data from Google Sheets
             if st.button("Load Data from Google Sheets"):
                 if spreadsheet_url:
-                    try:
-                        sheet_df = get_products_from_sheet(spreadsheet_url, worksheet)
-                        st.success("Successfully loaded data from Google Sheets")
-                        st.dataframe(sheet_df)
+                    start_job(
+                        "sheet_read",
+                        ("sheet_read", spreadsheet_url, worksheet),
+                        lambda job: get_products_from_sheet(spreadsheet_url, worksheet),
+                        "Reading Google Sheet"
+                    )
+                else:
+                    st.warning("Please enter a Google Sheets URL or ID")
+            
+            read_job = session_job("sheet_read")
+            if read_job is not None and read_job["status"] in ("QUEUED", "RUNNING"):
+                show_job_progress("sheet_read")
+            elif read_job is not None and read_job["status"] == "FAILED":
+                st.error(f"Error loading data from Google Sheets: {read_job['error']}")
+            elif read_job is not None:
+                sheet_df = read_job["result"]
+                st.success("Successfully loaded data from Google Sheets")
+                st.dataframe(sheet_df)
+                
+                # Option to update Baselinker from Google Sheets
+                st.subheader("Update Baselinker from Google Sheets")
+                
+                sheet_ids = sheet_df["ID"].tolist()
+                product_id = st.selectbox(
+                    "Select Product ID to update", 
+                    sheet_ids,
+                    index=sheet_ids.index(TARGET_PRODUCT_ID) if TARGET_PRODUCT_ID in sheet_ids else None
+                )
+                
+                if st.button("Update Product from Google Sheets") and product_id is not None:
+                    def update_from_sheet_job(job, product_id=product_id):
+                        written = {}
                         
-                        # Option to update Baselinker from Google Sheets
-                        st.subheader("Update Baselinker from Google Sheets")
+                        def update_and_record(inventory_id, product_id, field_id, value):
+                            written.update(inventory_id=inventory_id, text_fields={field_id: value})
+                            return update_product_extra_field(inventory_id, product_id, field_id, value)
                         
-                        if "ID" in sheet_df.columns and "Extra Field 484" in sheet_df.columns:
-                            product_id = st.selectbox(
-                                "Select Product ID to update", 
-                                sheet_df["ID"].tolist(),
-                                index=0 if TARGET_PRODUCT_ID in sheet_df["ID"].tolist() else None
+                        result = update_product_from_sheet(
+                            spreadsheet_url, 
+                            product_id,
+                            update_and_record,
+                            worksheet
+                        )
+                        if result.get("status") == "SUCCESS":
+                            # The sheets helper patched the product store, so only the in-memory copy needs the write
+                            get_inventory_cache().patch_text_fields(
+                                written["inventory_id"], product_id, written["text_fields"]
                             )
-                            
-                            if st.button("Update Product from Google Sheets"):
-                                result = update_product_from_sheet(
-                                    spreadsheet_url, 
-                                    product_id,
-                                    update_product_extra_field,
-                                    worksheet
-                                )
-                                
-                                if "status" in result and result["status"] == "SUCCESS":
-                                    st.success(f"Successfully updated product ID {product_id} from Google Sheets")
-                                    # Reload products data
-                                    load_products_data()
-                                else:
-                                    st.error(f"Failed to update product: {result}")
-                        else:
-                            st.warning("The Google Sheet must contain 'ID' and 'Extra Field 484' columns")
-                    except Exception as e:
-                        st.error(f"Error loading data from Google Sheets: {str(e)}")
-                else:
-                    st.warning("Please enter a Google Sheets URL or ID")
+                        return result
+                    
+                    start_job(
+                        "sheet_update",
+                        ("sheet_update", spreadsheet_url, worksheet, product_id),
+                        update_from_sheet_job,
+                        f"Updating product {product_id} from Google Sheets"
+                    )
+                
+                update_job = session_job("sheet_update")
+                if update_job is not None and update_job["status"] in ("QUEUED", "RUNNING"):
+                    show_job_progress("sheet_update")
+                elif update_job is not None and update_job["status"] == "FAILED":
+                    st.error(f"Failed to update product: {update_job['error']}")
+                elif update_job is not None:
+                    result = update_job["result"]
+                    if "status" in result and result["status"] == "SUCCESS":
+                        st.success(f"Successfully updated product {update_job['key'][3]} from Google Sheets")
+                    else:
+                        st.error(f"Failed to update product: {result}")
         
         with col2:
             # Button to export data to Google Sheets
             if st.button("Export Baselinker Data to Google Sheets"):
                 if spreadsheet_url and st.session_state.df is not None:
-                    try:
-                        for _, row in st.session_state.df.iterrows():
-                            product_data = row.to_dict()
-                            update_sheet_with_product_data(spreadsheet_url, product_data, worksheet)
-                        
-                        st.success("Successfully exported data to Google Sheets")
-                    except Exception as e:
-                        st.error(f"Error exporting data to Google Sheets: {str(e)}")
+                    records = st.session_state.df.to_dict("records")
+                    start_job(
+                        "sheet_export",
+                        ("sheet_export", spreadsheet_url, worksheet),
+                        lambda job: export_products_to_sheet(spreadsheet_url, records, worksheet),
+                        "Exporting to Google Sheets"
+                    )
                 elif not spreadsheet_url:
                     st.warning("Please enter a Google Sheets URL or ID")
                 else:
-                    st.warning("No product data available to export")
-                    if st.button("Load Baselinker Products"):
-                        load_products_data()
+                    st.warning("No product data available to export, it is still loading")
+            
+            export_job = session_job("sheet_export")
+            if export_job is not None and export_job["status"] in ("QUEUED", "RUNNING"):
+                show_job_progress("sheet_export")
+            elif export_job is not None and export_job["status"] == "FAILED":
+                st.error(f"Error exporting data to Google Sheets: {export_job['error']}")
+            elif export_job is not None:
+                export_result = export_job["result"]
+                st.success(
+                    f"Successfully exported data to Google Sheets: {export_result['updated']} cells updated, "
+                    f"{export_result['appended']} rows added, {export_result['unchanged']} unchanged"
+                )
+        
+        # Bulk sync of every changed product from Google Sheets
+        st.subheader("Sync All Changes from Google Sheets")
+        dry_run = st.checkbox("Dry run (only show what would change)", value=True)
+        
+        if st.button("Sync Google Sheets to Baselinker"):
+            if spreadsheet_url:
+                def reconcile_job(job, dry_run=dry_run):
+                    job.update(message="comparing the sheet with the inventory")
+                    result = reconcile_sheet_with_inventory(spreadsheet_url, INVENTORY_ID, worksheet, dry_run=dry_run)
+                    if result["report"] is not None:
+                        # The store was patched by the sheets helper, so only the in-memory copy needs the writes
+                        cache = get_inventory_cache()
+                        for product_id, product_report in result["report"]["products"].items():
+                            if product_report["status"] == "SENT":
+                                cache.patch_text_fields(INVENTORY_ID, product_id, product_report["sent_fields"])
+                    return result
+                
+                start_job(
+                    "sheet_sync",
+                    ("sheet_sync", spreadsheet_url, worksheet, dry_run),
+                    reconcile_job,
+                    "Syncing Google Sheets to Baselinker"
+                )
+            else:
+                st.warning("Please enter a Google Sheets URL or ID")
+        
+        sync_job = session_job("sheet_sync")
+        if sync_job is not None and sync_job["status"] in ("QUEUED", "RUNNING"):
+            show_job_progress("sheet_sync")
+        elif sync_job is not None and sync_job["status"] == "FAILED":
+            st.error(f"Error syncing from Google Sheets: {sync_job['error']}")
+        elif sync_job is not None:
+            result = sync_job["result"]
+            if result["failed_chunks"]:
+                st.error(f"Failed to read {len(result['failed_chunks'])} batches of products from Baselinker: "
+                         f"{result['failed_chunks'][0]['error']}")
+            if result["diff"]:
+                st.dataframe(pd.DataFrame(result["diff"]), use_container_width=True)
+            if result["missing"]:
+                st.warning(f"{len(result['missing'])} product IDs from the sheet are not in the inventory")
+            
+            report = result["report"]
+            if report is None:
+                if result["status"] != "ERROR":
+                    st.info(f"{len(result['diff'])} field values differ from Baselinker")
+            elif report["status"] == "SUCCESS":
+                st.success(f"Updated {report['sent']} field values, {report['skipped']} already up to date")
+            else:
+                st.error(f"Updated {report['sent']} field values, {report['failed']} failed")
+
+# Diagnostics Page
+elif page == "Diagnostics":
+    st.header("Diagnostics")
+    st.caption(
+        "Calls made by every session and background job in this process. Calls can't be told apart "
+        "by session, so the first column only narrows them to the time since this session started."
+    )
+    
+    baseline = st.session_state.metrics_baseline
+    rows = []
+    for (layer, method), stats in sorted(metrics_registry.snapshot().items()):
+        recent_calls = stats["calls"] - baseline.get((layer, method), {}).get("calls", 0)
+        rows.append({
+            "Layer": layer,
+            "Method": method,
+            "Calls since session start (all sessions)": recent_calls,
+            "Calls (process)": stats["calls"],
+            "Errors": stats["errors"],
+            "Throttled": stats["throttled"],
+            "Retries": stats["retries"],
+            "Avg ms": round(stats["seconds"] / stats["calls"] * 1000, 1),
+            "Max ms": round(stats["max_seconds"] * 1000, 1),
+            "KB sent": round(stats["request_bytes"] / 1024, 1),
+            "KB received": round(stats["response_bytes"] / 1024, 1)
+        })
+    
+    if rows:
+        st.subheader("Calls per method")
+        st.dataframe(pd.DataFrame(rows), use_container_width=True)
+        
+        st.subheader("Slowest calls in this process")
+        st.dataframe(pd.DataFrame([
+            {
+                "Layer": call["layer"],
+                "Method": call["method"],
+                "Seconds": round(call["seconds"], 3),
+                "Retries": call["retries"],
+                "Error": call["error_code"] or ""
+            }
+            for call in metrics_registry.slowest_calls()
+        ]), use_container_width=True)
+        
+        prometheus_text = metrics_registry.render_prometheus()
+        with st.expander("Prometheus metrics"):
+            st.code(prometheus_text)
+        st.download_button("Download Prometheus metrics", prometheus_text, file_name="metrics.prom", mime="text/plain")
+    else:
+        st.info("No API or Google Sheets calls recorded yet.")
@@ -0,0 +1,209 @@
+import asyncio
+import json
+import time
+import aiohttp
+from baselinker_api import (
+    RETRY_STATUS_CODES,
+    PRODUCTS_DATA_CHUNK_SIZE,
+    get_default_client,
+    is_throttled,
+    chunked,
+    products_list_filters
+)
+from metrics import registry as metrics_registry
+from settings import API_URL, TOKEN, REQUEST_TIMEOUT, MAX_RETRIES, ASYNC_MAX_CONCURRENCY
+
+
+class AsyncBaselinkerClient:
+    """asyncio Baselinker connector client with a pooled session, a concurrency cap and rate limiting"""
+
+    def __init__(self, token=TOKEN, api_url=API_URL, timeout=REQUEST_TIMEOUT,
+                 max_retries=MAX_RETRIES, backoff_factor=1.0, max_backoff=60.0,
+                 rate_limiter=None, max_concurrency=ASYNC_MAX_CONCURRENCY, pool_size=100, metrics=None):
+        self.token = token
+        self.api_url = api_url
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        # Share the blocking client's bucket by default, since both spend the same token's quota
+        self.rate_limiter = rate_limiter or get_default_client().rate_limiter
+        self.pool_size = pool_size
+        self.metrics = metrics or metrics_registry
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session = None
+
+        # Either a single number or a (connect, read) tuple, like the blocking client
+        if isinstance(timeout, tuple):
+            self.timeout = aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])
+        else:
+            self.timeout = aiohttp.ClientTimeout(total=timeout)
+
+    def _get_session(self):
+        """Create the pooled session lazily, inside the running event loop"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    def _backoff(self, attempt, retry_after=None):
+        """Seconds to wait before the next attempt"""
+        if retry_after:
+            try:
+                return min(self.max_backoff, float(retry_after))
+            except ValueError:
+                pass
+        return min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+
+    async def _acquire(self):
+        """Wait for a rate limiter token without blocking the event loop"""
+        delay = self.rate_limiter.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def request(self, method, parameters=None):
+        """Make a request to the Baselinker api, retrying throttled and transient failures"""
+        if parameters is None:
+            parameters = {}
+
+        data = {
+            "token": self.token,
+            "method": method,
+            "parameters": json.dumps(parameters)
+        }
+
+        session = self._get_session()
+        started = time.monotonic()
+        throttled = 0
+        response_bytes = 0
+        error_code = None
+        attempt = 0
+        try:
+            while True:
+                await self._acquire()
+                # Context managers release the slot and the connection on timeout and cancellation
+                try:
+                    async with self._semaphore:
+                        async with session.post(self.api_url, data=data) as response:
+                            if response.status in RETRY_STATUS_CODES:
+                                if attempt >= self.max_retries:
+                                    response.raise_for_status()
+                                delay = self._backoff(attempt, response.headers.get("Retry-After"))
+                                result = None
+                            else:
+                                body = await response.read()
+                                response_bytes += len(body)
+                                result = json.loads(body)
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                    if attempt >= self.max_retries:
+                        raise
+                    await asyncio.sleep(self._backoff(attempt))
+                    attempt += 1
+                    continue
+
+                if result is None:
+                    if response.status == 429:
+                        throttled += 1
+                        self.rate_limiter.pause(delay)
+                    else:
+                        await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+
+                if is_throttled(result) and attempt < self.max_retries:
+                    throttled += 1
+                    self.rate_limiter.pause(self._backoff(attempt))
+                    attempt += 1
+                    continue
+                if isinstance(result, dict) and result.get("status") == "ERROR":
+                    error_code = result.get("error_code", "ERROR")
+                return result
+        except BaseException as e:
+            error_code = type(e).__name__
+            raise
+        finally:
+            self.metrics.record(
+                "api_async",
+                method,
+                time.monotonic() - started,
+                request_bytes=sum(len(key) + len(value) + 2 for key, value in data.items()),
+                response_bytes=response_bytes,
+                retries=attempt,
+                throttled=throttled,
+                error_code=error_code
+            )
+
+    async def get_inventories(self):
+        """Get all inventories"""
+        return await self.request("getInventories")
+
+    async def get_inventory_products_list(self, inventory_id, page=None, **filters):
+        """Get one page of products in an inventory, optionally filtered server-side"""
+        parameters = {"inventory_id": inventory_id}
+        if page is not None:
+            parameters["page"] = page
+        parameters.update(products_list_filters(filters))
+        return await self.request("getInventoryProductsList", parameters)
+
+    async def get_inventory_products_data(self, inventory_id, products):
+        """Get detailed data for products in an inventory"""
+        parameters = {
+            "inventory_id": inventory_id,
+            "products": products
+        }
+        return await self.request("getInventoryProductsData", parameters)
+
+    async def fetch_inventory_products_data(self, inventory_id, product_ids, chunk_size=PRODUCTS_DATA_CHUNK_SIZE):
+        """
+        Get detailed data for any number of products, fetching all chunks concurrently
+
+        Returns:
+            dict: Same shape as baselinker_api.fetch_inventory_products_data
+        """
+        chunks = chunked(product_ids, chunk_size)
+        responses = await asyncio.gather(
+            *(self.get_inventory_products_data(inventory_id, chunk) for chunk in chunks),
+            return_exceptions=True
+        )
+
+        products = {}
+        failed_chunks = []
+        for chunk, response in zip(chunks, responses):
+            if isinstance(response, asyncio.CancelledError):
+                raise response
+            if isinstance(response, Exception):
+                response = {"status": "ERROR", "error_code": type(response).__name__, "error_message": str(response)}
+            if response.get("status") == "SUCCESS":
+                products.update(response.get("products") or {})
+            else:
+                failed_chunks.append({"product_ids": chunk, "error": response})
+
+        if not failed_chunks:
+            status = "SUCCESS"
+        elif len(failed_chunks) < len(chunks):
+            status = "PARTIAL"
+        else:
+            status = "ERROR"
+        return {"status": status, "products": products, "failed_chunks": failed_chunks}
+
+    async def update_product_extra_field(self, inventory_id, product_id, field_id, value):
+        """Update a product's extra field in text_fields"""
+        parameters = {
+            "inventory_id": inventory_id,
+            "product_id": product_id,
+            "text_fields": {
+                field_id: value
+            }
+        }
+        return await self.request("addInventoryProduct", parameters)
+
+    async def close(self):
+        """Close the underlying HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
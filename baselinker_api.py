@@ -1,32 +1,446 @@
 import requests
 import json
-from tabulate import tabulate
-from settings import API_URL, TOKEN, INVENTORY_ID, TARGET_PRODUCT_ID, EXTRA_FIELD_1_ID, EXTRA_FIELD_2_ID
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from requests.adapters import HTTPAdapter
+from metrics import registry as metrics_registry
+from response_cache import ResponseCache, INVALIDATING_METHODS
+try:
+    import orjson
+except ImportError:
+    orjson = None
+from settings import (
+    API_URL,
+    TOKEN,
+    INVENTORY_ID,
+    TARGET_PRODUCT_ID,
+    EXTRA_FIELD_1_ID,
+    EXTRA_FIELD_2_ID,
+    RATE_LIMIT_PER_MINUTE,
+    RATE_LIMIT_BURST,
+    REQUEST_TIMEOUT,
+    MAX_RETRIES,
+    MAX_WORKERS,
+    JSON_BACKEND,
+    RESPONSE_CACHE_ENABLED
+)
+
+# Error codes Baselinker returns when the token exceeds its request quota
+THROTTLE_ERROR_CODES = {"TOO_MANY_REQUESTS", "ERROR_QUERY_LIMIT_EXCEEDED"}
+# Message of the quota error when it comes with another code; other errors that merely
+# mention a limit (e.g. a too-long field) must not be retried
+THROTTLE_ERROR_MESSAGE = "query limit exceeded"
+
+# HTTP status codes worth retrying
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# getInventoryProductsList returns at most this many products per page
+PRODUCTS_LIST_PAGE_SIZE = 1000
+
+# Server-side filters accepted by getInventoryProductsList, without the "filter_" prefix
+PRODUCTS_LIST_FILTERS = (
+    "id",
+    "category_id",
+    "ean",
+    "sku",
+    "name",
+    "price_from",
+    "price_to",
+    "stock_from",
+    "stock_to",
+    "sort"
+)
+
+# Maximum number of product IDs per getInventoryProductsData call
+PRODUCTS_DATA_CHUNK_SIZE = 1000
+
+# Maximum number of products per updateInventoryProductsStock/Prices call
+PRODUCTS_UPDATE_BATCH_SIZE = 1000
+
+# getInventoryProductLogs returns at most this many events per page
+PRODUCT_LOGS_PAGE_SIZE = 100
+
+
+class BaselinkerAPIError(Exception):
+    """Raised when Baselinker answers with a non-SUCCESS status where a dict can't be returned"""
+
+    def __init__(self, method, response):
+        self.method = method
+        self.response = response
+        super().__init__(f"{method} failed: {response}")
+
+
+class RateLimiter:
+    """Token bucket that paces requests to the account's per-minute quota"""
+
+    def __init__(self, requests_per_minute=RATE_LIMIT_PER_MINUTE, burst=RATE_LIMIT_BURST):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = float(max(1, burst))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take one token and return how many seconds the caller has to wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Tokens may go negative, which queues callers in arrival order
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def pause(self, seconds):
+        """Drain the bucket so no caller sends anything for the next `seconds`"""
+        with self._lock:
+            self._tokens = min(self._tokens, -seconds * self.rate)
+            self._updated = time.monotonic()
+
+
+def _json_loads_for(backend):
+    """Pick the JSON decoder for non-streaming responses, one of json, orjson or auto"""
+    if backend == "orjson" or (backend == "auto" and orjson is not None):
+        if orjson is None:
+            raise ImportError("The orjson JSON backend needs the orjson package")
+        return orjson.loads
+    return json.loads
+
+
+def _ijson():
+    """Import ijson on first use, only streamed responses need it"""
+    try:
+        import ijson
+    except ImportError:
+        raise ImportError("Streaming responses need the ijson package")
+    return ijson
+
+def _iter_streamed_products(raw, header):
+    """
+    Yield (product_id, product) pairs from a connector response while it is parsed
+
+    Top-level scalars such as status, error_code and error_message are
+    collected into `header`, which is complete once the generator is exhausted.
+    """
+    ijson = _ijson()
+    product_id = None
+    builder = None
+    for prefix, event, value in ijson.parse(raw, use_float=True):
+        if builder is not None:
+            # The next key or the end of "products" closes the current product
+            if prefix == "products" and event in ("map_key", "end_map"):
+                yield product_id, builder.value
+                builder = None
+            else:
+                builder.event(event, value)
+                continue
+
+        if prefix == "products" and event == "map_key":
+            product_id = value
+            builder = ijson.ObjectBuilder()
+        elif "." not in prefix and prefix != "products" and event in ("string", "number", "boolean", "null"):
+            header[prefix] = value
+
+
+def is_throttled(result):
+    """Check whether a decoded response is a request-limit error"""
+    if not isinstance(result, dict) or result.get("status") != "ERROR":
+        return False
+    if result.get("error_code") in THROTTLE_ERROR_CODES:
+        return True
+    return THROTTLE_ERROR_MESSAGE in str(result.get("error_message", "")).lower()
+
+
+class BaselinkerClient:
+    """Reusable Baselinker connector client with a keep-alive session and rate limiting"""
+
+    def __init__(self, token=TOKEN, api_url=API_URL, timeout=REQUEST_TIMEOUT,
+                 max_retries=MAX_RETRIES, backoff_factor=1.0, max_backoff=60.0,
+                 rate_limiter=None, pool_size=10, json_backend=JSON_BACKEND, metrics=None, cache=None):
+        self.token = token
+        self.api_url = api_url
+        # Either a single number or a (connect, read) tuple, as accepted by requests
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.json_loads = _json_loads_for(json_backend)
+        self.metrics = metrics or metrics_registry
+        # Optional ResponseCache for read-only methods
+        self.cache = cache
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _backoff(self, attempt, retry_after=None):
+        """Seconds to wait before the next attempt"""
+        if retry_after:
+            try:
+                return min(self.max_backoff, float(retry_after))
+            except ValueError:
+                pass
+        return min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+
+    def _request_data(self, method, parameters):
+        """Build the form data of a connector call"""
+        return {
+            "token": self.token,
+            "method": method,
+            "parameters": json.dumps(parameters or {})
+        }
+
+    def _post(self, data, attempt, stats, stream=False):
+        """Send one attempt, returning None when it failed in a way worth retrying"""
+        self.rate_limiter.acquire()
+        try:
+            response = self.session.post(self.api_url, data=data, timeout=self.timeout, stream=stream)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= self.max_retries:
+                raise
+            time.sleep(self._backoff(attempt))
+            return None
+
+        if response.status_code in RETRY_STATUS_CODES:
+            if attempt >= self.max_retries:
+                response.raise_for_status()
+            delay = self._backoff(attempt, response.headers.get("Retry-After"))
+            response.close()
+            if response.status_code == 429:
+                stats["throttled"] += 1
+                self.rate_limiter.pause(delay)
+            else:
+                time.sleep(delay)
+            return None
+        return response
+
+    def _record(self, method, data, started, attempt, stats, error_code):
+        """Report one finished call to the metrics registry"""
+        self.metrics.record(
+            "api",
+            method,
+            time.monotonic() - started,
+            request_bytes=sum(len(key) + len(value) + 2 for key, value in data.items()),
+            response_bytes=stats["response_bytes"],
+            retries=attempt,
+            throttled=stats["throttled"],
+            error_code=error_code
+        )
+
+    def request(self, method, parameters=None):
+        """Make a request to the Baselinker api, through the response cache if enabled"""
+        if self.cache is None:
+            return self._send(method, parameters)
+        if method in INVALIDATING_METHODS:
+            result = self._send(method, parameters)
+            self.cache.invalidate_write(method, parameters)
+            return result
+        return self.cache.fetch(method, parameters, lambda: self._send(method, parameters))
+
+    def _send(self, method, parameters=None):
+        """Make a request to the Baselinker api, retrying throttled and transient failures"""
+        data = self._request_data(method, parameters)
+        stats = {"throttled": 0, "response_bytes": 0}
+        started = time.monotonic()
+        error_code = None
+
+        attempt = 0
+        try:
+            while True:
+                response = self._post(data, attempt, stats)
+                if response is not None:
+                    stats["response_bytes"] += len(response.content)
+                    result = self.json_loads(response.content)
+                    if not (is_throttled(result) and attempt < self.max_retries):
+                        if isinstance(result, dict) and result.get("status") == "ERROR":
+                            error_code = result.get("error_code", "ERROR")
+                        return result
+                    # Hold back every thread sharing this limiter, not only this one
+                    stats["throttled"] += 1
+                    self.rate_limiter.pause(self._backoff(attempt))
+                attempt += 1
+        except Exception as e:
+            error_code = type(e).__name__
+            raise
+        finally:
+            self._record(method, data, started, attempt, stats, error_code)
+
+    def stream_products(self, method, parameters=None):
+        """
+        Make a request and decode its "products" object incrementally
+
+        Products are parsed one by one from the response body as it arrives,
+        so memory use doesn't grow with the size of the response.
+
+        Yields:
+            tuple: (product_id, product)
+
+        Raises:
+            BaselinkerAPIError: If Baselinker answers with a non-SUCCESS status
+        """
+        # Fail before the request goes out if ijson is missing
+        _ijson()
+        data = self._request_data(method, parameters)
+        stats = {"throttled": 0, "response_bytes": 0}
+        started = time.monotonic()
+        error_code = None
+
+        attempt = 0
+        try:
+            while True:
+                response = self._post(data, attempt, stats, stream=True)
+                if response is None:
+                    attempt += 1
+                    continue
+
+                # Undo Content-Encoding while reading the raw socket stream
+                response.raw.decode_content = True
+                header = {}
+                yielded = False
+                with response:
+                    try:
+                        for product_id, product in _iter_streamed_products(response.raw, header):
+                            yielded = True
+                            yield product_id, product
+                    finally:
+                        stats["response_bytes"] += response.raw.tell()
+
+                if header.get("status") == "SUCCESS":
+                    return
+                if not yielded and is_throttled(header) and attempt < self.max_retries:
+                    stats["throttled"] += 1
+                    self.rate_limiter.pause(self._backoff(attempt))
+                    attempt += 1
+                    continue
+                raise BaselinkerAPIError(method, header)
+        except BaselinkerAPIError as e:
+            error_code = e.response.get("error_code", "ERROR")
+            raise
+        except Exception as e:
+            error_code = type(e).__name__
+            raise
+        finally:
+            self._record(method, data, started, attempt, stats, error_code)
+
+    def close(self):
+        """Close the underlying HTTP session"""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client():
+    """Get the shared client used by the module-level functions"""
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = BaselinkerClient(cache=ResponseCache() if RESPONSE_CACHE_ENABLED else None)
+    return _default_client
+
+
+def set_default_client(client):
+    """Replace the shared client used by the module-level functions"""
+    global _default_client
+    with _default_client_lock:
+        _default_client = client
 
 
 def make_request(method, parameters=None):
     """Make a request to the Baselinker api"""
-    if parameters is None:
-        parameters = {}
-        
-    data = {
-        "token": TOKEN,
-        "method": method,
-        "parameters": json.dumps(parameters)
-    }
-    
-    response = requests.post(API_URL, data=data)
-    return response.json()
+    return get_default_client().request(method, parameters)
 
 def get_inventories():
     """Get all inventories"""
     return make_request("getInventories")
 
-def get_inventory_products_list(inventory_id):
-    """Get list of products in an inventory"""
+def products_list_filters(filters):
+    """Turn filter keyword arguments into getInventoryProductsList parameters"""
+    parameters = {}
+    for name, value in filters.items():
+        if name not in PRODUCTS_LIST_FILTERS:
+            raise TypeError(f"Unknown getInventoryProductsList filter: {name}")
+        if value is not None:
+            parameters[f"filter_{name}"] = value
+    return parameters
+
+def get_inventory_products_list(inventory_id, page=None, **filters):
+    """Get one page of products in an inventory, optionally filtered server-side"""
     parameters = {"inventory_id": inventory_id}
+    if page is not None:
+        parameters["page"] = page
+    parameters.update(products_list_filters(filters))
     return make_request("getInventoryProductsList", parameters)
 
+def products_from_list_response(response):
+    """Get (product_id, product) pairs from a getInventoryProductsList response"""
+    if response.get("status") != "SUCCESS":
+        raise BaselinkerAPIError("getInventoryProductsList", response)
+    products = response.get("products") or {}
+    if isinstance(products, list):
+        return [(str(product["id"]), product) for product in products]
+    return [(str(product_id), product) for product_id, product in products.items()]
+
+def iter_inventory_products(inventory_id, prefetch=True, **filters):
+    """
+    Iterate over every product in an inventory, page by page
+
+    The next page is requested in the background while the current one is
+    being consumed. Accepts the same filters as get_inventory_products_list
+    (category_id, ean, sku, name, price_from, price_to, stock_from, stock_to).
+
+    Yields:
+        tuple: (product_id, product) with the list-level product data
+    """
+    # Validate filters before the first request goes out
+    products_list_filters(filters)
+
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        page = 1
+        next_page = None
+        while True:
+            if next_page is not None:
+                response = next_page.result()
+            else:
+                response = get_inventory_products_list(inventory_id, page=page, **filters)
+            products = products_from_list_response(response)
+
+            next_page = None
+            if executor is not None and len(products) >= PRODUCTS_LIST_PAGE_SIZE:
+                next_page = executor.submit(get_inventory_products_list, inventory_id, page + 1, **filters)
+
+            yield from products
+
+            if len(products) < PRODUCTS_LIST_PAGE_SIZE:
+                break
+            page += 1
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+def get_inventory_product_ids(inventory_id, **filters):
+    """Get IDs of all products in an inventory across every page"""
+    return [product_id for product_id, _ in iter_inventory_products(inventory_id, **filters)]
+
 def get_inventory_products_data(inventory_id, products):
     """Get detailed data for products in an inventory"""
     parameters = {
@@ -35,6 +449,114 @@ def get_inventory_products_data(inventory_id, products):
     }
     return make_request("getInventoryProductsData", parameters)
 
+def get_inventory_product_logs(date_from=None, page=1, product_id=None):
+    """
+    Get one page of product change events, oldest first, optionally since a Unix timestamp
+
+    Baselinker documents product_id as required. Without it the call asks
+    for the events of every product, which the API may reject; callers
+    have to handle an ERROR response by falling back to a full sync.
+    """
+    parameters = {"sort": "ASC", "page": page}
+    if date_from is not None:
+        parameters["date_from"] = int(date_from)
+    if product_id is not None:
+        parameters["product_id"] = product_id
+    return make_request("getInventoryProductLogs", parameters)
+
+def chunked(items, size):
+    """Split a sequence into lists of at most `size` items"""
+    items = list(items)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def error_response(error):
+    """Turn an exception into a Baselinker-style error response"""
+    return {"status": "ERROR", "error_code": type(error).__name__, "error_message": str(error)}
+
+def call_or_error(func, *args):
+    """Call func(*args) on a worker thread, turning transport failures into an error response"""
+    try:
+        return func(*args)
+    except (requests.RequestException, ValueError) as e:
+        return error_response(e)
+
+def iter_inventory_products_data(inventory_id, product_ids, chunk_size=PRODUCTS_DATA_CHUNK_SIZE,
+                                 max_workers=MAX_WORKERS):
+    """
+    Fetch detailed product data in chunks on a bounded worker pool
+
+    At most `max_workers` chunks are in flight at once, and every call goes
+    through the shared client's rate limiter.
+
+    Yields:
+        tuple: (chunk_ids, response) for each chunk, in completion order
+    """
+    chunks = iter(chunked(product_ids, chunk_size))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+        for chunk in chunks:
+            pending[executor.submit(call_or_error, get_inventory_products_data, inventory_id, chunk)] = chunk
+            if len(pending) >= max_workers:
+                break
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = pending.pop(future)
+                result = future.result()
+                # Keep the pool busy before handing the result to the caller
+                next_chunk = next(chunks, None)
+                if next_chunk is not None:
+                    next_future = executor.submit(call_or_error, get_inventory_products_data, inventory_id, next_chunk)
+                    pending[next_future] = next_chunk
+                yield chunk, result
+
+def fetch_inventory_products_data(inventory_id, product_ids, chunk_size=PRODUCTS_DATA_CHUNK_SIZE,
+                                  max_workers=MAX_WORKERS):
+    """
+    Get detailed data for any number of products, merged into one mapping
+
+    Returns:
+        dict: {"status", "products", "failed_chunks"}. Status is "SUCCESS" when
+        every chunk succeeded, "PARTIAL" when some failed and "ERROR" when all
+        failed. Each failed chunk is reported as {"product_ids", "error"}.
+    """
+    products = {}
+    failed_chunks = []
+    succeeded = 0
+    for chunk, response in iter_inventory_products_data(inventory_id, product_ids, chunk_size, max_workers):
+        if response.get("status") == "SUCCESS":
+            products.update(response.get("products") or {})
+            succeeded += 1
+        else:
+            failed_chunks.append({"product_ids": chunk, "error": response})
+
+    if not failed_chunks:
+        status = "SUCCESS"
+    elif succeeded:
+        status = "PARTIAL"
+    else:
+        status = "ERROR"
+    return {"status": status, "products": products, "failed_chunks": failed_chunks}
+
+def stream_inventory_products_data(inventory_id, product_ids, chunk_size=PRODUCTS_DATA_CHUNK_SIZE):
+    """
+    Get detailed product data with memory use bounded by one product at a time
+
+    Chunks are requested one after another and each response is decoded
+    incrementally, so peak memory doesn't depend on the batch size.
+
+    Yields:
+        tuple: (product_id, product)
+    """
+    client = get_default_client()
+    for chunk in chunked(product_ids, chunk_size):
+        parameters = {
+            "inventory_id": inventory_id,
+            "products": chunk
+        }
+        yield from client.stream_products("getInventoryProductsData", parameters)
+
 def update_product_extra_field(inventory_id, product_id, field_id, value):
     """Update a product's extra field in text_fields"""
     parameters = {
@@ -46,3 +568,180 @@ def update_product_extra_field(inventory_id, product_id, field_id, value):
     }
     return make_request("addInventoryProduct", parameters)
 
+
+def update_product_text_fields(inventory_id, product_id, text_fields):
+    """Update several text_fields of one product in a single call"""
+    parameters = {
+        "inventory_id": inventory_id,
+        "product_id": product_id,
+        "text_fields": text_fields
+    }
+    return make_request("addInventoryProduct", parameters)
+
+def _same_value(current, new):
+    """Compare a stored text field with a new value, treating missing as empty"""
+    current = "" if current is None else current
+    new = "" if new is None else new
+    return current == new or str(current) == str(new)
+
+def update_products_text_fields(inventory_id, updates, current_products=None, max_workers=MAX_WORKERS):
+    """
+    Write many text field values, one call per product and only where the value changed
+
+    Args:
+        inventory_id (int): ID of the inventory
+        updates (iterable): (product_id, field_id, value) triples. Several fields
+            of one product are merged into a single addInventoryProduct call.
+        current_products (dict, optional): Last known product data keyed by
+            product ID, as returned by getInventoryProductsData. Fetched for the
+            touched products when omitted. Patched in place after successful writes.
+        max_workers (int, optional): Number of concurrent update calls
+
+    Returns:
+        dict: {"status", "sent", "skipped", "failed", "products"}. The counts are
+        field writes; "products" maps each product ID to its own
+        {"status", "sent_fields", "skipped_fields", "error"} report.
+    """
+    merged = {}
+    for product_id, field_id, value in updates:
+        merged.setdefault(str(product_id), {})[field_id] = value
+
+    if current_products is None:
+        current_products = fetch_inventory_products_data(inventory_id, list(merged))["products"]
+
+    report = {"status": "SUCCESS", "sent": 0, "skipped": 0, "failed": 0, "products": {}}
+    pending = {}
+    for product_id, fields in merged.items():
+        product = current_products.get(product_id)
+        known_fields = (product or {}).get("text_fields") or {}
+        changed = {}
+        skipped = []
+        for field_id, value in fields.items():
+            if product is not None and _same_value(known_fields.get(field_id), value):
+                skipped.append(field_id)
+            else:
+                changed[field_id] = value
+
+        report["skipped"] += len(skipped)
+        report["products"][product_id] = {
+            "status": "SKIPPED" if not changed else "PENDING",
+            "sent_fields": changed,
+            "skipped_fields": skipped,
+            "error": None
+        }
+        if changed:
+            pending[product_id] = changed
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(call_or_error, update_product_text_fields, inventory_id, product_id, fields): product_id
+            for product_id, fields in pending.items()
+        }
+        for future in futures:
+            product_id = futures[future]
+            fields = pending[product_id]
+            result = future.result()
+            product_report = report["products"][product_id]
+            if result.get("status") == "SUCCESS":
+                product_report["status"] = "SENT"
+                report["sent"] += len(fields)
+                # Keep the caller's snapshot in step with what Baselinker now holds
+                product = current_products.get(product_id)
+                if product is not None:
+                    product.setdefault("text_fields", {}).update(fields)
+            else:
+                product_report["status"] = "FAILED"
+                product_report["error"] = result
+                report["failed"] += len(fields)
+
+    if report["failed"]:
+        report["status"] = "PARTIAL" if report["sent"] or report["skipped"] else "ERROR"
+    return report
+
+def update_inventory_products_stock(inventory_id, products):
+    """Set stock of many products in one call, as {product_id: {warehouse_id: quantity}}"""
+    parameters = {
+        "inventory_id": inventory_id,
+        "products": products
+    }
+    return make_request("updateInventoryProductsStock", parameters)
+
+def update_inventory_products_prices(inventory_id, products):
+    """Set prices of many products in one call, as {product_id: {price_group_id: price}}"""
+    parameters = {
+        "inventory_id": inventory_id,
+        "products": products
+    }
+    return make_request("updateInventoryProductsPrices", parameters)
+
+def _merge_product_values(values):
+    """Accept {product_id: {key: value}} or (product_id, key, value) triples"""
+    if isinstance(values, dict):
+        return {str(product_id): dict(product_values) for product_id, product_values in values.items()}
+    merged = {}
+    for product_id, key, value in values:
+        merged.setdefault(str(product_id), {})[str(key)] = value
+    return merged
+
+def _bulk_update(update_func, inventory_id, values, batch_size, max_workers):
+    """Run a batch update method over any number of products and merge the per-product results"""
+    products = _merge_product_values(values)
+    batches = [
+        {product_id: products[product_id] for product_id in chunk}
+        for chunk in chunked(products, batch_size)
+    ]
+
+    report = {"status": "SUCCESS", "updated": 0, "warnings": {}, "failed": {}}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(call_or_error, update_func, inventory_id, batch) for batch in batches]
+        for batch, future in zip(batches, futures):
+            result = future.result()
+            if result.get("status") == "SUCCESS":
+                report["updated"] += int(result.get("counter", 0))
+                # Warnings come back keyed by product ID; PHP sends an empty list when there are none
+                warnings = result.get("warnings") or {}
+                for product_id, warning in warnings.items():
+                    report["warnings"][str(product_id)] = warning
+            else:
+                for product_id in batch:
+                    report["failed"][product_id] = result
+
+    if report["failed"]:
+        report["status"] = "PARTIAL" if len(report["failed"]) < len(products) else "ERROR"
+    return report
+
+def bulk_update_inventory_products_stock(inventory_id, stock, batch_size=PRODUCTS_UPDATE_BATCH_SIZE,
+                                         max_workers=MAX_WORKERS):
+    """
+    Set stock of any number of products with updateInventoryProductsStock
+
+    Args:
+        inventory_id (int): ID of the inventory
+        stock (dict or iterable): {product_id: {warehouse_id: quantity}} or
+            (product_id, warehouse_id, quantity) triples, e.g. warehouse "bl_1"
+        batch_size (int, optional): Products per call, at most 1000
+        max_workers (int, optional): Number of concurrent calls
+
+    Returns:
+        dict: {"status", "updated", "warnings", "failed"}. "updated" is the sum of
+        Baselinker's counters, "warnings" maps product IDs to Baselinker's warning
+        and "failed" maps the products of failed batches to the error response.
+    """
+    return _bulk_update(update_inventory_products_stock, inventory_id, stock, batch_size, max_workers)
+
+def bulk_update_inventory_products_prices(inventory_id, prices, batch_size=PRODUCTS_UPDATE_BATCH_SIZE,
+                                          max_workers=MAX_WORKERS):
+    """
+    Set prices of any number of products with updateInventoryProductsPrices
+
+    Args:
+        inventory_id (int): ID of the inventory
+        prices (dict or iterable): {product_id: {price_group_id: price}} or
+            (product_id, price_group_id, price) triples
+        batch_size (int, optional): Products per call, at most 1000
+        max_workers (int, optional): Number of concurrent calls
+
+    Returns:
+        dict: Same shape as bulk_update_inventory_products_stock
+    """
+    return _bulk_update(update_inventory_products_prices, inventory_id, prices, batch_size, max_workers)
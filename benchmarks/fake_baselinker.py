@@ -0,0 +1,191 @@
+import json
+import multiprocessing
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class FakeBaselinker:
+    """In-memory stand-in for the connector.php methods this project uses"""
+
+    def __init__(self, products=1000, inventory_id=833, page_size=1000, latency=0.0, rate_limit=None,
+                 inventory_wide_logs=False):
+        self.inventory_id = inventory_id
+        # Baselinker documents product_id as required by getInventoryProductLogs; set this
+        # to serve the events of every product when it is left out
+        self.inventory_wide_logs = inventory_wide_logs
+        # Products per list page; the client only asks for the next page after a full
+        # one of 1000, so a smaller page here would end the listing early
+        self.page_size = page_size
+        # Seconds added to every response, to emulate network and server time
+        self.latency = latency
+        # Requests per minute before TOO_MANY_REQUESTS errors, None for no limit
+        self.rate_limit = rate_limit
+        self.calls = {}
+        # Change log served by getInventoryProductLogs, one event per written product
+        self.logs = []
+        self._recent = deque()
+        self._lock = threading.Lock()
+        self.products = {}
+        for i in range(products):
+            product_id = str(10000000 + i)
+            self.products[product_id] = {
+                "sku": f"SKU-{i}",
+                "ean": f"{5900000000000 + i}",
+                "stock": {"bl_1": i % 50},
+                "prices": {"1": round(10 + (i % 500) * 0.5, 2)},
+                "text_fields": {
+                    "name": f"Product {i}",
+                    "extra_field_467": f"color-{i % 12}",
+                    "extra_field_484": f"value-{i % 7}",
+                    "description_extra1": "",
+                    "description_extra2": ""
+                }
+            }
+
+    def _throttled(self):
+        if self.rate_limit is None:
+            return False
+        now = time.monotonic()
+        while self._recent and now - self._recent[0] > 60:
+            self._recent.popleft()
+        if len(self._recent) >= self.rate_limit:
+            return True
+        self._recent.append(now)
+        return False
+
+    def handle(self, method, parameters):
+        """Answer one connector call like Baselinker would"""
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            if method == "benchmarkStats":
+                return {"status": "SUCCESS", "calls": dict(self.calls)}
+            if self._throttled():
+                return {
+                    "status": "ERROR",
+                    "error_code": "TOO_MANY_REQUESTS",
+                    "error_message": "Query limit exceeded"
+                }
+            handler = getattr(self, f"_{method}", None)
+            if handler is None:
+                return {"status": "ERROR", "error_code": "ERROR_UNKNOWN_METHOD", "error_message": method}
+            return handler(parameters)
+
+    def _getInventories(self, parameters):
+        return {"status": "SUCCESS", "inventories": [{"inventory_id": self.inventory_id, "name": "Benchmark"}]}
+
+    def _getInventoryProductsList(self, parameters):
+        page = int(parameters.get("page", 1))
+        ids = list(self.products)
+        if "filter_sku" in parameters:
+            ids = [product_id for product_id in ids if parameters["filter_sku"] in self.products[product_id]["sku"]]
+        page_ids = ids[(page - 1) * self.page_size:page * self.page_size]
+        products = {}
+        for product_id in page_ids:
+            product = self.products[product_id]
+            products[product_id] = {
+                "id": int(product_id),
+                "ean": product["ean"],
+                "sku": product["sku"],
+                "name": product["text_fields"]["name"],
+                "stock": product["stock"],
+                "prices": product["prices"]
+            }
+        # PHP encodes an empty array as a JSON list
+        return {"status": "SUCCESS", "products": products or []}
+
+    def _getInventoryProductsData(self, parameters):
+        products = {
+            str(product_id): self.products[str(product_id)]
+            for product_id in parameters.get("products", [])
+            if str(product_id) in self.products
+        }
+        return {"status": "SUCCESS", "products": products or []}
+
+    def _addInventoryProduct(self, parameters):
+        product = self.products.get(str(parameters.get("product_id")))
+        if product is None:
+            return {"status": "ERROR", "error_code": "ERROR_PRODUCT_ID", "error_message": "Product not found"}
+        product["text_fields"].update(parameters.get("text_fields", {}))
+        self._log(parameters["product_id"])
+        return {"status": "SUCCESS", "product_id": parameters["product_id"]}
+
+    def _update_products(self, parameters, field):
+        warnings = {}
+        counter = 0
+        for product_id, values in parameters.get("products", {}).items():
+            product = self.products.get(str(product_id))
+            if product is None:
+                warnings[str(product_id)] = "Product not found"
+                continue
+            product[field].update(values)
+            self._log(product_id)
+            counter += 1
+        return {"status": "SUCCESS", "counter": counter, "warnings": warnings or []}
+
+    def _updateInventoryProductsStock(self, parameters):
+        return self._update_products(parameters, "stock")
+
+    def _updateInventoryProductsPrices(self, parameters):
+        return self._update_products(parameters, "prices")
+
+    def _log(self, product_id):
+        self.logs.append({"product_id": int(product_id), "date": int(time.time()), "entries": []})
+
+    def _getInventoryProductLogs(self, parameters):
+        if "product_id" not in parameters and not self.inventory_wide_logs:
+            return {"status": "ERROR", "error_code": "ERROR_EMPTY_PARAM", "error_message": "Missing product_id"}
+        page = int(parameters.get("page", 1))
+        date_from = int(parameters.get("date_from", 0))
+        logs = [
+            log for log in self.logs
+            if log["date"] >= date_from and str(parameters.get("product_id", log["product_id"])) == str(log["product_id"])
+        ]
+        return {"status": "SUCCESS", "logs": logs[(page - 1) * 100:page * 100]}
+
+
+def make_server(fake, host="127.0.0.1", port=0):
+    """Create an HTTP server answering connector.php style POSTs from `fake`"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            form = parse_qs(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8"))
+            method = form.get("method", [""])[0]
+            parameters = json.loads(form.get("parameters", ["{}"])[0])
+            if fake.latency:
+                time.sleep(fake.latency)
+            body = json.dumps(fake.handle(method, parameters)).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def _serve(options, port_queue):
+    server = make_server(FakeBaselinker(**options))
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+def serve_in_background(**options):
+    """
+    Run a fake Baselinker server in a child process, so its memory doesn't count against the benchmark
+
+    Returns:
+        tuple: (process, api_url). Terminate the process when done.
+    """
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(options, port_queue), daemon=True)
+    process.start()
+    port = port_queue.get(timeout=30)
+    return process, f"http://127.0.0.1:{port}/connector.php"
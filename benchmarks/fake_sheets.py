@@ -0,0 +1,124 @@
+import re
+
+
+class FakeCell:
+    """Minimal gspread.Cell"""
+
+    def __init__(self, row, col, value):
+        self.row = row
+        self.col = col
+        self.value = value
+
+
+def _a1_to_rowcol(label):
+    """Turn "C5" into (5, 3); a missing row number gives None"""
+    match = re.fullmatch(r"([A-Z]+)(\d*)", label)
+    col = 0
+    for char in match.group(1):
+        col = col * 26 + ord(char) - 64
+    return (int(match.group(2)) if match.group(2) else None), col
+
+
+class FakeWorksheet:
+    """In-memory stand-in for the gspread.Worksheet methods this project uses, counting API calls"""
+
+    def __init__(self, rows=None):
+        self.rows = [list(row) for row in rows or []]
+        self.calls = {}
+
+    def _call(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def _cell(self, row, col):
+        if row - 1 < len(self.rows) and col - 1 < len(self.rows[row - 1]):
+            return self.rows[row - 1][col - 1]
+        return ""
+
+    def _set(self, row, col, value):
+        while len(self.rows) < row:
+            self.rows.append([])
+        cells = self.rows[row - 1]
+        while len(cells) < col:
+            cells.append("")
+        cells[col - 1] = value
+
+    def row_values(self, row):
+        self._call("row_values")
+        values = list(self.rows[row - 1]) if row - 1 < len(self.rows) else []
+        while values and values[-1] == "":
+            values.pop()
+        return values
+
+    def col_values(self, col):
+        self._call("col_values")
+        values = [self._cell(row, col) for row in range(1, len(self.rows) + 1)]
+        while values and values[-1] == "":
+            values.pop()
+        return values
+
+    def get_all_values(self):
+        self._call("get_all_values")
+        return [list(row) for row in self.rows]
+
+    def get_all_records(self):
+        self._call("get_all_records")
+        headers = self.rows[0] if self.rows else []
+        records = []
+        for row in self.rows[1:]:
+            record = {}
+            for i, header in enumerate(headers):
+                value = row[i] if i < len(row) else ""
+                # gspread turns numeric cells into numbers
+                record[header] = int(value) if isinstance(value, str) and value.isdigit() else value
+            records.append(record)
+        return records
+
+    def batch_get(self, ranges):
+        self._call("batch_get")
+        result = []
+        for label in ranges:
+            start, end = label.split(":")
+            first_row, first_col = _a1_to_rowcol(start)
+            last_row, last_col = _a1_to_rowcol(end)
+            last_row = last_row or len(self.rows)
+            values = []
+            for row in range(first_row, last_row + 1):
+                cells = [self._cell(row, col) for col in range(first_col, last_col + 1)]
+                while cells and cells[-1] == "":
+                    cells.pop()
+                values.append(cells)
+            while values and not values[-1]:
+                values.pop()
+            result.append(values)
+        return result
+
+    def batch_update(self, data, **kwargs):
+        self._call("batch_update")
+        for update in data:
+            row, col = _a1_to_rowcol(update["range"])
+            self._set(row, col, update["values"][0][0])
+
+    def update_cell(self, row, col, value):
+        self._call("update_cell")
+        self._set(row, col, value)
+
+    def append_row(self, values, **kwargs):
+        self._call("append_row")
+        self.rows.append(list(values))
+
+    def append_rows(self, values, **kwargs):
+        self._call("append_rows")
+        self.rows.extend(list(row) for row in values)
+
+    def findall(self, query):
+        self._call("findall")
+        return [
+            FakeCell(row_index + 1, col_index + 1, value)
+            for row_index, row in enumerate(self.rows)
+            for col_index, value in enumerate(row)
+            if str(value) == str(query)
+        ]
+
+    @property
+    def api_calls(self):
+        return sum(self.calls.values())
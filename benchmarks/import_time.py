@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Cold-start import benchmark for the core modules and the command-line entry point
+
+Run from the project root:
+
+    python -m benchmarks.import_time --repeat 5
+
+Every module is imported in a fresh interpreter. A module fails when its
+median import time is over its budget, or when it pulls in one of the
+optional layers (pandas, Google Sheets, tabulate, Streamlit) that only the
+app and the commands needing them may load. Exits with status 1 on any
+failure, so it can gate a CI job.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds a cold import may take, on top of the interpreter's own start-up
+IMPORT_BUDGETS = {
+    "settings": 0.1,
+    "baselinker_api": 0.35,
+    "product_store": 0.35,
+    "sync_engine": 0.35,
+    "main": 0.4
+}
+
+# Optional layers that must stay out of the core and the CLI's start-up
+OPTIONAL_MODULES = (
+    "pandas",
+    "pyarrow",
+    "openpyxl",
+    "gspread",
+    "google.oauth2",
+    "google_auth_oauthlib",
+    "tabulate",
+    "streamlit",
+    "ijson"
+)
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+print(json.dumps({{"seconds": seconds, "loaded": [m for m in {optional!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module, repeat):
+    """Import `module` in `repeat` fresh interpreters"""
+    probe = PROBE.format(module=module, optional=OPTIONAL_MODULES)
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, "-c", probe], cwd=PROJECT_ROOT, text=True)
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        "median_seconds": round(statistics.median(run["seconds"] for run in runs), 4),
+        "max_seconds": round(max(run["seconds"] for run in runs), 4),
+        "optional_loaded": sorted(set().union(*(run["loaded"] for run in runs)))
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start import time of the core modules")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--budget-scale", type=float, default=1.0,
+                        help="multiply every budget, for slower machines")
+    parser.add_argument("--modules", nargs="+", choices=sorted(IMPORT_BUDGETS), default=list(IMPORT_BUDGETS))
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    options = parser.parse_args(argv)
+
+    results = []
+    for module in options.modules:
+        budget = IMPORT_BUDGETS[module] * options.budget_scale
+        result = {"module": module, "budget_seconds": budget, **measure(module, options.repeat)}
+        result["ok"] = result["median_seconds"] <= budget and not result["optional_loaded"]
+        results.append(result)
+
+    output = json.dumps({"python": platform.python_version(), "results": results}, indent=2)
+    if options.output:
+        with open(options.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0 if all(result["ok"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks against a local Baselinker stand-in and an in-memory worksheet
+
+Run from the project root:
+
+    python -m benchmarks.run_benchmarks --products 20000 --latency 0.05 --output results.json
+
+Every scenario gets a fresh fake server, so results are repeatable and can be
+compared between versions. Every scenario works on the whole inventory, so a
+result whose item count differs from --products is marked as failed and the
+run exits with status 1.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Keep the benchmark away from the real product cache and token
+_workdir = tempfile.mkdtemp(prefix="baselinker_bench_")
+os.environ["PRODUCT_CACHE_PATH"] = os.path.join(_workdir, "products_cache.sqlite3")
+os.environ.setdefault("TOKEN", "benchmark")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from baselinker_api import (  # noqa: E402
+    PRODUCTS_LIST_PAGE_SIZE,
+    BaselinkerClient,
+    RateLimiter,
+    fetch_inventory_products_data,
+    get_default_client,
+    iter_inventory_products_data,
+    set_default_client,
+    update_products_text_fields
+)
+from benchmarks.fake_baselinker import serve_in_background  # noqa: E402
+from benchmarks.fake_sheets import FakeWorksheet  # noqa: E402
+from google_sheets_helper import (  # noqa: E402
+    export_products_to_sheet,
+    reconcile_sheet_with_inventory,
+    register_worksheet
+)
+from metrics import registry as metrics_registry  # noqa: E402
+from product_store import ProductStore  # noqa: E402
+from product_table import ProductTable  # noqa: E402
+from settings import EXTRA_FIELD_2_ID, MAX_WORKERS, PRODUCT_TABLE_FIELDS  # noqa: E402
+
+INVENTORY_ID = 833
+SPREADSHEET_URL = "benchmark-spreadsheet"
+SHEET_HEADERS = ["ID"] + list(PRODUCT_TABLE_FIELDS)
+
+
+def _changed_ids(product_ids, ratio):
+    """Every n-th product, so the same products change on every run"""
+    step = max(1, round(1 / ratio)) if ratio else len(product_ids) + 1
+    return set(product_ids[::step])
+
+
+def _sheet_rows(records, stale_ids=(), stale_column="Extra Field 484"):
+    rows = [SHEET_HEADERS]
+    for record in records:
+        row = [str(record.get(header, "")) for header in SHEET_HEADERS]
+        if record["ID"] in stale_ids:
+            row[SHEET_HEADERS.index(stale_column)] = "stale"
+        rows.append(row)
+    return rows
+
+
+def _current_products(product_ids):
+    products_data = fetch_inventory_products_data(INVENTORY_ID, product_ids)
+    return products_data["products"]
+
+
+def scenario_inventory_load(options):
+    """Cold sync into an empty product store, then the column-wise table build"""
+    store = ProductStore(os.path.join(_workdir, f"load_{time.monotonic_ns()}.sqlite3"))
+
+    def run():
+        products_data = store.get_products(INVENTORY_ID, max_age=0)
+        table = ProductTable.from_products(products_data["products"], release=True)
+        return len(table), {}
+    return run
+
+
+def scenario_products_data(options):
+    """Fetch every product in chunks, many more of them than workers, and check each comes back once"""
+    product_ids = _list_ids()
+
+    def run():
+        seen = {}
+        chunks = failed = 0
+        for chunk, response in iter_inventory_products_data(INVENTORY_ID, product_ids, options.chunk_size):
+            chunks += 1
+            if response.get("status") != "SUCCESS":
+                failed += 1
+                continue
+            chunk_ids = set(map(str, chunk))
+            for product_id in response.get("products") or {}:
+                if product_id not in chunk_ids:
+                    raise AssertionError(f"product {product_id} returned for another chunk")
+                seen[product_id] = seen.get(product_id, 0) + 1
+        missing = len(set(map(str, product_ids)) - set(seen))
+        duplicates = sum(1 for count in seen.values() if count > 1)
+        if not failed and (missing or duplicates):
+            raise AssertionError(f"{missing} products missing and {duplicates} returned more than once")
+        return len(seen), {"chunks": chunks, "workers": MAX_WORKERS, "failed_chunks": failed}
+    return run
+
+
+def scenario_bulk_update(options):
+    """Write Extra Field 484 for every product, where only a share of the values changed"""
+    products = _current_products(_list_ids())
+    changed = _changed_ids(sorted(products), options.change_ratio)
+    updates = [
+        (product_id, EXTRA_FIELD_2_ID, "updated" if product_id in changed else product["text_fields"][EXTRA_FIELD_2_ID])
+        for product_id, product in products.items()
+    ]
+
+    def run():
+        report = update_products_text_fields(INVENTORY_ID, updates, products)
+        return len(updates), {"sent": report["sent"], "skipped": report["skipped"], "failed": report["failed"]}
+    return run
+
+
+def scenario_sheet_export(options):
+    """Export the product table to a sheet that holds half the products, some of them stale"""
+    table = ProductTable.from_products(_current_products(_list_ids()), release=True)
+    records = table.df.to_dict("records")
+    in_sheet = records[:len(records) // 2]
+    stale = _changed_ids([record["ID"] for record in in_sheet], options.change_ratio)
+    worksheet = FakeWorksheet(_sheet_rows(in_sheet, stale))
+    register_worksheet(SPREADSHEET_URL, 0, worksheet)
+
+    def run():
+        result = export_products_to_sheet(SPREADSHEET_URL, records, 0)
+        return len(records), dict(result, sheets_calls=worksheet.api_calls)
+    return run
+
+
+def scenario_sheet_sync(options):
+    """Push the sheet's Extra Field 484 column to the inventory, where a share of it differs"""
+    products = _current_products(_list_ids())
+    records = ProductTable.from_products(products).df.to_dict("records")
+    changed = _changed_ids([record["ID"] for record in records], options.change_ratio)
+    worksheet = FakeWorksheet(_sheet_rows(records, changed))
+    register_worksheet(SPREADSHEET_URL, 0, worksheet)
+
+    def run():
+        # Fetches the sheet's products from the fake server, like the app does
+        result = reconcile_sheet_with_inventory(SPREADSHEET_URL, INVENTORY_ID, 0)
+        report = result["report"] or {"sent": 0, "failed": 0}
+        return len(records), {
+            "diff": len(result["diff"]),
+            "sent": report["sent"],
+            "failed": report["failed"],
+            "sheets_calls": worksheet.api_calls
+        }
+    return run
+
+
+SCENARIOS = {
+    "inventory_load": scenario_inventory_load,
+    "products_data": scenario_products_data,
+    "bulk_update": scenario_bulk_update,
+    "sheet_export": scenario_sheet_export,
+    "sheet_sync": scenario_sheet_sync
+}
+
+
+def _list_ids():
+    from baselinker_api import get_inventory_product_ids
+    return get_inventory_product_ids(INVENTORY_ID)
+
+
+def _server_calls():
+    calls = get_default_client().request("benchmarkStats")["calls"]
+    calls.pop("benchmarkStats", None)
+    return calls
+
+
+def run_scenario(name, options):
+    """Run one scenario against a fresh fake server and measure it"""
+    process, api_url = serve_in_background(
+        products=options.products,
+        inventory_id=INVENTORY_ID,
+        page_size=options.page_size,
+        latency=options.latency,
+        rate_limit=options.server_rate_limit
+    )
+    try:
+        set_default_client(BaselinkerClient(
+            token="benchmark",
+            api_url=api_url,
+            backoff_factor=0.1,
+            rate_limiter=RateLimiter(options.client_rate_limit, burst=options.client_burst)
+        ))
+
+        # Setup (seeding sheets, fetching the "known" state) is not measured
+        run = SCENARIOS[name](options)
+        calls_before = _server_calls()
+        metrics_registry.reset()
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        items, details = run()
+        wall_seconds = time.perf_counter() - started
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        calls_after = _server_calls()
+        api_calls = {
+            method: count - calls_before.get(method, 0)
+            for method, count in calls_after.items()
+            if count - calls_before.get(method, 0)
+        }
+        throttled = sum(stats["throttled"] for stats in metrics_registry.snapshot().values())
+        return {
+            "scenario": name,
+            "wall_seconds": round(wall_seconds, 4),
+            "items": items,
+            "items_per_second": round(items / wall_seconds, 1) if wall_seconds else None,
+            "api_calls": sum(api_calls.values()),
+            "api_calls_by_method": api_calls,
+            "throttled": throttled,
+            "peak_memory_bytes": peak_memory,
+            "details": details,
+            # Fewer items than products means the scenario lost data on the way
+            "ok": items == options.products
+        }
+    finally:
+        get_default_client().close()
+        process.terminate()
+        process.join()
+
+
+def _page_size(value):
+    """--page-size type: the client stops paging at the first page shorter than Baselinker's 1000"""
+    size = int(value)
+    if size < PRODUCTS_LIST_PAGE_SIZE:
+        raise argparse.ArgumentTypeError(
+            f"must be at least {PRODUCTS_LIST_PAGE_SIZE}, a shorter page is taken as the last one"
+        )
+    return size
+
+
+def _version():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL,
+            text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline Baselinker and Google Sheets benchmarks")
+    parser.add_argument("--products", type=int, default=5000, help="inventory size")
+    parser.add_argument("--page-size", type=_page_size, default=PRODUCTS_LIST_PAGE_SIZE,
+                        help=f"getInventoryProductsList page size, at least {PRODUCTS_LIST_PAGE_SIZE}")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every API response")
+    parser.add_argument("--server-rate-limit", type=int, default=None,
+                        help="requests per minute before the fake server throttles")
+    parser.add_argument("--client-rate-limit", type=int, default=1000000,
+                        help="requests per minute the client paces itself to")
+    parser.add_argument("--client-burst", type=int, default=100, help="client token bucket size")
+    parser.add_argument("--chunk-size", type=int, default=100,
+                        help="getInventoryProductsData chunk size of the products_data scenario")
+    parser.add_argument("--change-ratio", type=float, default=0.1, help="share of values that differ")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    options = parser.parse_args(argv)
+
+    results = {
+        "version": _version(),
+        "python": platform.python_version(),
+        "timestamp": time.time(),
+        "config": {key: value for key, value in vars(options).items() if key not in ("output", "scenarios")},
+        "results": [run_scenario(name, options) for name in options.scenarios]
+    }
+
+    output = json.dumps(results, indent=2)
+    if options.output:
+        with open(options.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    for result in results["results"]:
+        if not result["ok"]:
+            print(f"{result['scenario']}: {result['items']} items, expected {options.products}", file=sys.stderr)
+    return 0 if all(result["ok"] for result in results["results"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,11 @@
+import pandas as pd
+
+# Columns with fewer distinct values than this share of rows are stored as categoricals
+CATEGORY_THRESHOLD = 0.5
+
+
+def compact_column(values):
+    """Turn a list of strings into a categorical or string column, whichever fits"""
+    if values and len(set(values)) < len(values) * CATEGORY_THRESHOLD:
+        return pd.Categorical(values)
+    return pd.array(values, dtype="string")
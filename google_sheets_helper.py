@@ -6,7 +6,15 @@ import os
 import pandas as pd
 import json
 from settings import EXTRA_FIELD_2_ID
+from metrics import instrumented, record_transfer
+from columns import compact_column
 import pickle
+import datetime
+import hashlib
+import threading
+
+# Maximum number of cell ranges or rows sent in one Sheets request
+SHEETS_BATCH_SIZE = 1000
 
 # Define the scope
 SCOPES = [
@@ -14,20 +22,40 @@ SCOPES = [
     'https://www.googleapis.com/auth/drive'
 ]
 
-def get_google_sheets_client():
+# Refresh OAuth tokens this many seconds before they expire
+TOKEN_REFRESH_MARGIN = 300
+
+TOKEN_PATH = os.path.join(os.path.dirname(__file__), 'token.pickle')
+CREDENTIALS_PATH = os.path.join(os.path.dirname(__file__), 'credentials.json')
+
+# Process-wide cache of the authorized client and opened spreadsheets/worksheets
+_cache_lock = threading.RLock()
+_client = None
+_credentials = None
+_refresh_timer = None
+_spreadsheets = {}
+_worksheets = {}
+
+# Last column read per (spreadsheet, worksheet, columns): {"revision", "fingerprint", "df"}
+_column_reads = {}
+
+def _save_credentials(creds):
+    """Save the credentials for the next run"""
+    with open(TOKEN_PATH, 'wb') as token:
+        pickle.dump(creds, token)
+
+def _load_credentials():
     """
-    Authenticate and create a Google Sheets client using OAuth2
+    Load saved OAuth2 credentials, refreshing them or asking the user to log in
     
     Returns:
-        gspread.Client: Authenticated Google Sheets client
+        google.oauth2.credentials.Credentials: Valid credentials
     """
     creds = None
-    token_path = os.path.join(os.path.dirname(__file__), 'token.pickle')
-    credentials_path = os.path.join(os.path.dirname(__file__), 'credentials.json')
     
     # Check if token.pickle exists (saved credentials)
-    if os.path.exists(token_path):
-        with open(token_path, 'rb') as token:
+    if os.path.exists(TOKEN_PATH):
+        with open(TOKEN_PATH, 'rb') as token:
             try:
                 creds = pickle.load(token)
             except Exception:
@@ -38,42 +66,146 @@ def get_google_sheets_client():
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
             creds.refresh(Request())
+            _save_credentials(creds)
         else:
             # Check if credentials file exists
-            if not os.path.exists(credentials_path):
+            if not os.path.exists(CREDENTIALS_PATH):
                 raise FileNotFoundError(
                     "credentials.json file not found. Please place your Google API credentials file in the project directory."
                 )
             
             # Load client secrets from credentials.json
-            flow = InstalledAppFlow.from_client_secrets_file(credentials_path, SCOPES)
+            flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_PATH, SCOPES)
             creds = flow.run_local_server(port=0)
             
-            # Save the credentials for the next run
-            with open(token_path, 'wb') as token:
-                pickle.dump(creds, token)
+            _save_credentials(creds)
     
-    # Return the authenticated client
-    return gspread.authorize(creds)
+    return creds
 
-def get_sheet_data(spreadsheet_url, worksheet_name=0):
+def _cancel_refresh():
+    """Stop the pending background refresh"""
+    global _refresh_timer
+    if _refresh_timer is not None:
+        _refresh_timer.cancel()
+        _refresh_timer = None
+
+def _schedule_refresh(creds):
+    """Refresh the cached credentials in the background shortly before they expire"""
+    global _refresh_timer
+    _cancel_refresh()
+    if not creds.refresh_token or creds.expiry is None:
+        return
+    
+    # Credentials.expiry is a naive UTC datetime
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    delay = (creds.expiry - now).total_seconds() - TOKEN_REFRESH_MARGIN
+    _refresh_timer = threading.Timer(max(0, delay), _refresh_credentials, args=(creds,))
+    _refresh_timer.daemon = True
+    _refresh_timer.start()
+
+def _refresh_credentials(creds):
+    """Background refresh of the cached credentials, used by the gspread client in place"""
+    with _cache_lock:
+        if creds is not _credentials:
+            return
+        try:
+            creds.refresh(Request())
+        except Exception:
+            # Leave it to the next get_google_sheets_client call to re-authenticate
+            return
+        _save_credentials(creds)
+        _schedule_refresh(creds)
+
+def _record_sheets_transfer(response, *args, **kwargs):
+    """requests response hook reporting each Sheets API exchange to the running instrumented call"""
+    body = response.request.body or b""
+    record_transfer(
+        len(body.encode() if isinstance(body, str) else body),
+        len(response.content),
+        int(response.status_code == 429)
+    )
+
+@instrumented("sheets")
+def get_google_sheets_client():
     """
-    Get data from a Google Sheet
+    Get the cached Google Sheets client, authenticating with OAuth2 on first use
+    
+    Returns:
+        gspread.Client: Authenticated Google Sheets client
+    """
+    global _client, _credentials
+    with _cache_lock:
+        if _client is not None and _credentials.valid:
+            return _client
+        
+        if _client is not None and _credentials.expired and _credentials.refresh_token:
+            # The client holds this credentials object, so refreshing it in place is enough
+            _credentials.refresh(Request())
+            _save_credentials(_credentials)
+            _schedule_refresh(_credentials)
+            return _client
+        
+        _credentials = _load_credentials()
+        _client = gspread.authorize(_credentials)
+        _client.http_client.session.hooks["response"].append(_record_sheets_transfer)
+        _spreadsheets.clear()
+        _worksheets.clear()
+        _schedule_refresh(_credentials)
+        return _client
+
+def invalidate_sheets_cache(spreadsheet_url=None, auth=False):
+    """
+    Drop cached handles so the next call reopens them
+    
+    Args:
+        spreadsheet_url (str, optional): Only drop handles of this spreadsheet. Defaults to all.
+        auth (bool, optional): Also drop the authorized client. Defaults to False.
+    """
+    global _client, _credentials
+    with _cache_lock:
+        if auth:
+            _client = None
+            _credentials = None
+            _cancel_refresh()
+        if auth or spreadsheet_url is None:
+            _spreadsheets.clear()
+            _worksheets.clear()
+            _column_reads.clear()
+            return
+        _spreadsheets.pop(spreadsheet_url, None)
+        for cache in (_worksheets, _column_reads):
+            for key in [key for key in cache if key[0] == spreadsheet_url]:
+                del cache[key]
+
+@instrumented("sheets")
+def open_worksheet(spreadsheet_url, worksheet_name=0):
+    """
+    Open a worksheet of a Google Sheet, reusing the cached handle if there is one
     
     Args:
         spreadsheet_url (str): URL or key of the spreadsheet
         worksheet_name (str or int, optional): Name or index of the worksheet. Defaults to 0 (first sheet).
     
     Returns:
-        pandas.DataFrame: DataFrame containing the sheet data
+        gspread.Worksheet: The opened worksheet
     """
-    client = get_google_sheets_client()
+    # The lock only guards the handle caches; opening goes over the network, so it
+    # runs unlocked and a concurrent open of the same sheet keeps the first handle
+    with _cache_lock:
+        worksheet = _worksheets.get((spreadsheet_url, worksheet_name))
+        if worksheet is not None:
+            return worksheet
+        spreadsheet = _spreadsheets.get(spreadsheet_url)
     
     # Open the spreadsheet
-    try:
-        spreadsheet = client.open_by_url(spreadsheet_url) if 'http' in spreadsheet_url else client.open_by_key(spreadsheet_url)
-    except gspread.exceptions.SpreadsheetNotFound:
-        raise ValueError(f"Spreadsheet not found: {spreadsheet_url}")
+    if spreadsheet is None:
+        client = get_google_sheets_client()
+        try:
+            spreadsheet = client.open_by_url(spreadsheet_url) if 'http' in spreadsheet_url else client.open_by_key(spreadsheet_url)
+        except gspread.exceptions.SpreadsheetNotFound:
+            raise ValueError(f"Spreadsheet not found: {spreadsheet_url}")
+        with _cache_lock:
+            spreadsheet = _spreadsheets.setdefault(spreadsheet_url, spreadsheet)
     
     # Get the worksheet
     if isinstance(worksheet_name, int):
@@ -84,10 +216,164 @@ def get_sheet_data(spreadsheet_url, worksheet_name=0):
     if not worksheet:
         raise ValueError(f"Worksheet not found: {worksheet_name}")
     
+    with _cache_lock:
+        return _worksheets.setdefault((spreadsheet_url, worksheet_name), worksheet)
+
+def register_worksheet(spreadsheet_url, worksheet_name, worksheet):
+    """
+    Put an already opened worksheet into the handle cache
+    
+    Lets offline tools and benchmarks hand in a stand-in with the gspread
+    worksheet interface; open_worksheet returns it without authenticating.
+    """
+    with _cache_lock:
+        _worksheets[(spreadsheet_url, worksheet_name)] = worksheet
+
+def _api_error_status(error):
+    """Get the HTTP status code of a gspread APIError"""
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+def with_worksheet(spreadsheet_url, worksheet_name, func):
+    """
+    Call func(worksheet), reopening the worksheet once if the cached handle went stale
+    
+    Auth errors (401/403) drop the cached client as well, not-found errors
+    (404 or a missing worksheet) drop only the handles of this spreadsheet.
+    
+    Args:
+        spreadsheet_url (str): URL or key of the spreadsheet
+        worksheet_name (str or int): Name or index of the worksheet
+        func (callable): Function taking the worksheet
+    
+    Returns:
+        Whatever func returns
+    """
+    try:
+        return func(open_worksheet(spreadsheet_url, worksheet_name))
+    except gspread.exceptions.WorksheetNotFound:
+        invalidate_sheets_cache(spreadsheet_url)
+    except gspread.exceptions.APIError as e:
+        status = _api_error_status(e)
+        if status not in (401, 403, 404):
+            raise
+        invalidate_sheets_cache(spreadsheet_url, auth=status in (401, 403))
+    return func(open_worksheet(spreadsheet_url, worksheet_name))
+
+@instrumented("sheets")
+def get_sheet_data(spreadsheet_url, worksheet_name=0):
+    """
+    Get data from a Google Sheet
+    
+    Args:
+        spreadsheet_url (str): URL or key of the spreadsheet
+        worksheet_name (str or int, optional): Name or index of the worksheet. Defaults to 0 (first sheet).
+    
+    Returns:
+        pandas.DataFrame: DataFrame containing the sheet data
+    """
     # Get all values
-    data = worksheet.get_all_records()
+    data = with_worksheet(spreadsheet_url, worksheet_name, lambda worksheet: worksheet.get_all_records())
     return pd.DataFrame(data)
 
+def _column_letter(col):
+    """A1 letter of a 1-indexed column"""
+    return gspread.utils.rowcol_to_a1(1, col).rstrip("0123456789")
+
+def _sheet_revision(worksheet):
+    """
+    Get the spreadsheet's Drive modifiedTime, a cheap marker that changes with every edit
+    
+    Returns None when it can't be read (e.g. a stand-in worksheet or no Drive access),
+    in which case the columns are always downloaded and compared by content.
+    """
+    spreadsheet = getattr(worksheet, "spreadsheet", None)
+    if spreadsheet is None or not hasattr(spreadsheet, "get_lastUpdateTime"):
+        return None
+    try:
+        return spreadsheet.get_lastUpdateTime()
+    except gspread.exceptions.APIError:
+        return None
+
+def _read_columns(worksheet, key, columns, optional):
+    """Ranged column read into an opened worksheet, see read_sheet_columns"""
+    revision = _sheet_revision(worksheet)
+    with _cache_lock:
+        cached = _column_reads.get(key)
+    if cached is not None and revision is not None and cached["revision"] == revision:
+        return cached["df"]
+    
+    headers = worksheet.row_values(1)
+    header_index = {header.lower(): i + 1 for i, header in enumerate(headers)}  # 1-indexed
+    
+    missing_columns = [col for col in columns if col.lower() not in header_index and col not in optional]
+    if missing_columns:
+        raise ValueError(f"Required columns missing from sheet: {', '.join(missing_columns)}")
+    
+    present = [col for col in columns if col.lower() in header_index]
+    ranges = []
+    for col in present:
+        letter = _column_letter(header_index[col.lower()])
+        ranges.append(f"{letter}2:{letter}")
+    column_values = worksheet.batch_get(ranges) if ranges else []
+    
+    # Ranged reads come back ragged, pad every column to the longest one
+    length = max((len(values) for values in column_values), default=0)
+    data = {
+        col: [str(row[0]) if row else "" for row in values] + [""] * (length - len(values))
+        for col, values in zip(present, column_values)
+    }
+    
+    digest = hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()
+    if cached is not None and cached["fingerprint"] == digest:
+        cached["revision"] = revision
+        return cached["df"]
+    
+    # Drop rows that are blank in every requested column
+    keep = [i for i in range(length) if any(data[col][i] for col in present)]
+    
+    df = pd.DataFrame({
+        col: pd.array([data[col][i] for i in keep], dtype="string") if col == "ID"
+        else compact_column([data[col][i] for i in keep])
+        for col in present
+    })
+    df.attrs["fingerprint"] = digest
+    with _cache_lock:
+        _column_reads[key] = {"revision": revision, "fingerprint": digest, "df": df}
+    return df
+
+@instrumented("sheets")
+def read_sheet_columns(spreadsheet_url, columns, worksheet_name=0, optional=()):
+    """
+    Read only the named columns of a Google Sheet
+    
+    The header row is read to locate the columns, then all of them are fetched
+    in one ranged batch request. Values come back as compact string or
+    categorical columns, with "ID" always a string column. The result is cached
+    per spreadsheet revision: while the spreadsheet's Drive modifiedTime is
+    unchanged no cell data is downloaded at all, and an unchanged download is
+    detected by its content fingerprint and answered from the cache.
+    
+    Args:
+        spreadsheet_url (str): URL or key of the spreadsheet
+        columns (list): Header names of the columns to read, matched case-insensitively
+        worksheet_name (str or int, optional): Name or index of the worksheet. Defaults to 0 (first sheet).
+        optional (tuple, optional): Columns that may be missing from the sheet. Defaults to none.
+    
+    Returns:
+        pandas.DataFrame: One column per requested column found in the sheet.
+        df.attrs["fingerprint"] changes whenever the returned content does.
+        The frame is shared with later reads, copy it before modifying it.
+    """
+    columns = list(dict.fromkeys(columns))
+    key = (spreadsheet_url, worksheet_name, tuple(columns))
+    return with_worksheet(
+        spreadsheet_url,
+        worksheet_name,
+        lambda worksheet: _read_columns(worksheet, key, columns, optional)
+    )
+
+@instrumented("sheets")
 def update_sheet_with_product_data(spreadsheet_url, product_data, worksheet_name=0):
     """
     Update a Google Sheet with product data
@@ -100,72 +386,102 @@ def update_sheet_with_product_data(spreadsheet_url, product_data, worksheet_name
     Returns:
         bool: True if update was successful
     """
-    client = get_google_sheets_client()
+    export_products_to_sheet(spreadsheet_url, [product_data], worksheet_name)
+    return True
+
+@instrumented("sheets")
+def export_products_to_sheet(spreadsheet_url, products, worksheet_name=0, update_columns=("Extra Field 484",)):
+    """
+    Export many products to a Google Sheet in a handful of batched requests
     
-    # Open the spreadsheet
-    try:
-        spreadsheet = client.open_by_url(spreadsheet_url) if 'http' in spreadsheet_url else client.open_by_key(spreadsheet_url)
-    except gspread.exceptions.SpreadsheetNotFound:
-        raise ValueError(f"Spreadsheet not found: {spreadsheet_url}")
+    The header row and the ID and update columns are read once to build an
+    ID-to-row index. Existing rows get only the cells whose value changed,
+    products missing from the sheet are appended as new rows.
     
-    # Get the worksheet
-    if isinstance(worksheet_name, int):
-        worksheet = spreadsheet.get_worksheet(worksheet_name)
-    else:
-        worksheet = spreadsheet.worksheet(worksheet_name)
+    Args:
+        spreadsheet_url (str): URL or key of the spreadsheet
+        products (list): Product dicts keyed by column name, each with an "ID"
+        worksheet_name (str or int, optional): Name or index of the worksheet. Defaults to 0 (first sheet).
+        update_columns (tuple, optional): Columns written for products already in the sheet
     
-    if not worksheet:
-        raise ValueError(f"Worksheet not found: {worksheet_name}")
+    Returns:
+        dict: Number of "updated" cells, "appended" rows and "unchanged" products
+    """
+    result = with_worksheet(
+        spreadsheet_url,
+        worksheet_name,
+        lambda worksheet: _export_products_to_worksheet(worksheet, products, update_columns)
+    )
     
-    # Update the worksheet with the product data
+    # Drive's modifiedTime can lag behind our own writes, don't serve reads from before them
+    with _cache_lock:
+        for key in [key for key in _column_reads if key[:2] == (spreadsheet_url, worksheet_name)]:
+            del _column_reads[key]
+    return result
+
+def _export_products_to_worksheet(worksheet, products, update_columns):
+    """Batched export into an opened worksheet, see export_products_to_sheet"""
     # Assuming the first row contains headers
     headers = worksheet.row_values(1)
+    header_index = {header.lower(): i + 1 for i, header in enumerate(headers)}  # 1-indexed
     
-    # Find the product ID column and the Extra Field 484 column
-    id_col = None
-    extra_field_col = None
-    
-    for i, header in enumerate(headers):
-        if header.lower() == "id":
-            id_col = i + 1  # 1-indexed
-        elif header.lower() == "extra field 484":
-            extra_field_col = i + 1  # 1-indexed
-    
-    if id_col is None or extra_field_col is None:
-        raise ValueError("Required columns 'ID' and 'Extra Field 484' not found in the sheet")
-    
-    # Find the row with the matching product ID
-    cell_list = worksheet.findall(product_data["ID"])
-    product_row = None
-    
-    for cell in cell_list:
-        if cell.col == id_col:
-            product_row = cell.row
-            break
-    
-    if product_row is None:
-        # Product not found, add a new row
-        new_row = [""] * len(headers)
-        for i, header in enumerate(headers):
-            header_lower = header.lower()
-            if header_lower == "id":
-                new_row[i] = product_data["ID"]
-            elif header_lower == "extra field 484":
-                new_row[i] = product_data.get("Extra Field 484", "")
-            elif header_lower in [k.lower() for k in product_data.keys()]:
-                # Find the case-insensitive match
-                for k in product_data.keys():
-                    if k.lower() == header_lower:
-                        new_row[i] = product_data[k]
-                        break
-        
-        worksheet.append_row(new_row)
-    else:
-        # Update the existing row
-        worksheet.update_cell(product_row, extra_field_col, product_data.get("Extra Field 484", ""))
+    missing_columns = [col for col in ("ID",) + tuple(update_columns) if col.lower() not in header_index]
+    if missing_columns:
+        raise ValueError(f"Required columns missing from sheet: {', '.join(missing_columns)}")
     
-    return True
+    # Read the ID column and the update columns in one request
+    read_columns = ["ID"] + list(update_columns)
+    ranges = []
+    for col in read_columns:
+        letter = _column_letter(header_index[col.lower()])
+        ranges.append(f"{letter}2:{letter}")
+    column_values = worksheet.batch_get(ranges)
+    
+    def cell(values, offset):
+        return values[offset][0] if offset < len(values) and values[offset] else ""
+    
+    # Map product IDs to sheet rows, first occurrence wins like the old per-row lookup
+    id_to_row = {}
+    for offset in range(len(column_values[0])):
+        product_id = str(cell(column_values[0], offset))
+        if product_id and product_id not in id_to_row:
+            id_to_row[product_id] = offset + 2
+    
+    cell_updates = []
+    new_rows = {}
+    unchanged = 0
+    for product_data in products:
+        product_id = str(product_data["ID"])
+        product_row = id_to_row.get(product_id)
+        
+        if product_row is None:
+            # Product not found, add a new row (a repeated ID replaces the pending row)
+            values_by_header = {k.lower(): v for k, v in product_data.items()}
+            new_rows[product_id] = [values_by_header.get(header.lower(), "") for header in headers]
+            continue
+        
+        changed = False
+        for col, values in zip(update_columns, column_values[1:]):
+            value = product_data.get(col, "")
+            if str(cell(values, product_row - 2)) != str(value):
+                cell_updates.append({
+                    "range": gspread.utils.rowcol_to_a1(product_row, header_index[col.lower()]),
+                    "values": [[value]]
+                })
+                changed = True
+        if not changed:
+            unchanged += 1
+    
+    # Each batch is a single API call
+    for i in range(0, len(cell_updates), SHEETS_BATCH_SIZE):
+        worksheet.batch_update(cell_updates[i:i + SHEETS_BATCH_SIZE], value_input_option="USER_ENTERED")
+    new_rows = list(new_rows.values())
+    for i in range(0, len(new_rows), SHEETS_BATCH_SIZE):
+        worksheet.append_rows(new_rows[i:i + SHEETS_BATCH_SIZE])
+    
+    return {"updated": len(cell_updates), "appended": len(new_rows), "unchanged": unchanged}
 
+@instrumented("sheets")
 def get_products_from_sheet(spreadsheet_url, worksheet_name=0):
     """
     Get product data from a Google Sheet
@@ -175,19 +491,18 @@ def get_products_from_sheet(spreadsheet_url, worksheet_name=0):
         worksheet_name (str or int, optional): Name or index of the worksheet. Defaults to 0 (first sheet).
     
     Returns:
-        pandas.DataFrame: DataFrame containing the product data
+        pandas.DataFrame: DataFrame with the "ID", "Extra Field 484" and, if
+        present, "Inventory ID" columns
     """
-    df = get_sheet_data(spreadsheet_url, worksheet_name)
-    
-    # Ensure required columns exist
-    required_columns = ["ID", "Extra Field 484"]
-    missing_columns = [col for col in required_columns if col not in df.columns]
-    
-    if missing_columns:
-        raise ValueError(f"Required columns missing from sheet: {', '.join(missing_columns)}")
-    
-    return df
+    # Raises ValueError if a required column is missing
+    return read_sheet_columns(
+        spreadsheet_url,
+        ["ID", "Extra Field 484", "Inventory ID"],
+        worksheet_name,
+        optional=("Inventory ID",)
+    )
 
+@instrumented("sheets")
 def update_product_from_sheet(spreadsheet_url, product_id, update_func, worksheet_name=0):
     """
     Update a product's extra_field_484 value from Google Sheets
@@ -204,7 +519,7 @@ def update_product_from_sheet(spreadsheet_url, product_id, update_func, workshee
     df = get_products_from_sheet(spreadsheet_url, worksheet_name)
     
     # Find the product in the sheet
-    product_row = df[df["ID"] == product_id]
+    product_row = df[df["ID"] == str(product_id)]
     
     if product_row.empty:
         return {"status": "ERROR", "error": f"Product ID {product_id} not found in the sheet"}
@@ -217,6 +532,7 @@ def update_product_from_sheet(spreadsheet_url, product_id, update_func, workshee
     if not inventory_id:
         from settings import INVENTORY_ID
         inventory_id = INVENTORY_ID
+    inventory_id = int(inventory_id)
     
     result = update_func(
         inventory_id,
@@ -225,4 +541,132 @@ def update_product_from_sheet(spreadsheet_url, product_id, update_func, workshee
         extra_field_value
     )
     
+    # Keep the local product cache in step with the write
+    if result.get("status") == "SUCCESS":
+        from product_store import get_default_store
+        get_default_store().update_text_fields(inventory_id, product_id, {EXTRA_FIELD_2_ID: extra_field_value})
+    
     return result
+
+@instrumented("sheets")
+def reconcile_sheet_with_inventory(spreadsheet_url, inventory_id=None, worksheet_name=0, column_map=None,
+                                   current_products=None, dry_run=False, skip_blank=True, use_store=False):
+    """
+    Push every sheet value that differs from Baselinker in one batched update
+    
+    The sheet is read once and joined against the current inventory state on
+    "ID". Only products whose mapped columns differ are sent, through the
+    rate-limited bulk writer, one call per product. The current state is
+    fetched from Baselinker for the sheet's product IDs, since the local
+    product cache can be hours old.
+    
+    Args:
+        spreadsheet_url (str): URL or key of the spreadsheet
+        inventory_id (int, optional): ID of the inventory. Defaults to settings.INVENTORY_ID.
+            Rows with a different "Inventory ID" are ignored.
+        worksheet_name (str or int, optional): Name or index of the worksheet. Defaults to 0 (first sheet).
+        column_map (dict, optional): Sheet column to text field ID. Defaults to
+            {"Extra Field 484": EXTRA_FIELD_2_ID}.
+        current_products (dict, optional): Product data keyed by product ID. Defaults to
+            fresh getInventoryProductsData results for the sheet's product IDs.
+        dry_run (bool, optional): Only compute the diff, don't write anything. Defaults to False.
+        skip_blank (bool, optional): Don't clear fields whose sheet cell is empty. Defaults to True.
+        use_store (bool, optional): Diff against the local product cache instead of
+            fetching, when current_products isn't given. Faster, but may resend or miss
+            values changed in Baselinker since the last sync. Defaults to False.
+    
+    Returns:
+        dict: {"status", "diff", "missing", "failed_chunks", "report"}. "diff" lists
+        {"product_id", "column", "field_id", "current", "new"} changes, "missing"
+        lists sheet IDs not found in the inventory, "failed_chunks" the product
+        data requests that failed (their products are left out of the diff) and
+        "report" is the bulk writer's report (None on a dry run).
+    """
+    if inventory_id is None:
+        from settings import INVENTORY_ID
+        inventory_id = INVENTORY_ID
+    if column_map is None:
+        column_map = {"Extra Field 484": EXTRA_FIELD_2_ID}
+    
+    # Raises ValueError if a required column is missing
+    df = read_sheet_columns(
+        spreadsheet_url,
+        ["ID", "Inventory ID"] + list(column_map),
+        worksheet_name,
+        optional=("Inventory ID",)
+    )
+    records = []
+    for record in df.astype(object).to_dict("records"):
+        record["ID"] = str(record["ID"]).strip()
+        if not record["ID"]:
+            continue
+        row_inventory_id = record.get("Inventory ID")
+        if row_inventory_id not in (None, "") and str(row_inventory_id) != str(inventory_id):
+            continue
+        records.append(record)
+    
+    failed_chunks = []
+    if current_products is None and use_store:
+        from product_store import load_inventory_products
+        current_products = load_inventory_products(inventory_id)["products"]
+    elif current_products is None:
+        from baselinker_api import fetch_inventory_products_data
+        fetched = fetch_inventory_products_data(inventory_id, list(dict.fromkeys(record["ID"] for record in records)))
+        if fetched["status"] == "ERROR":
+            return {"status": "ERROR", "diff": [], "missing": [], "failed_chunks": fetched["failed_chunks"],
+                    "report": None}
+        current_products = fetched["products"]
+        failed_chunks = fetched["failed_chunks"]
+    unknown = {str(product_id) for chunk in failed_chunks for product_id in chunk["product_ids"]}
+    
+    diff = []
+    missing = []
+    for record in records:
+        product_id = record["ID"]
+        if product_id in unknown:
+            continue
+        
+        product = current_products.get(product_id)
+        if product is None:
+            missing.append(product_id)
+            continue
+        
+        text_fields = product.get("text_fields") or {}
+        for column, field_id in column_map.items():
+            new_value = record[column]
+            if skip_blank and new_value == "":
+                continue
+            current_value = text_fields.get(field_id, "")
+            if str(current_value) != str(new_value):
+                diff.append({
+                    "product_id": product_id,
+                    "column": column,
+                    "field_id": field_id,
+                    "current": current_value,
+                    "new": new_value
+                })
+    
+    status = "PARTIAL" if failed_chunks else "SUCCESS"
+    if dry_run or not diff:
+        return {"status": status, "diff": diff, "missing": missing, "failed_chunks": failed_chunks, "report": None}
+    
+    from baselinker_api import update_products_text_fields
+    report = update_products_text_fields(
+        inventory_id,
+        [(change["product_id"], change["field_id"], change["new"]) for change in diff],
+        current_products=current_products
+    )
+    
+    # Keep the local product cache in step with the writes
+    from product_store import get_default_store
+    store = get_default_store()
+    for product_id, product_report in report["products"].items():
+        if product_report["status"] == "SENT":
+            store.update_text_fields(inventory_id, product_id, product_report["sent_fields"])
+    
+    if report["status"] == "SUCCESS":
+        report_status = status
+    else:
+        report_status = report["status"]
+    return {"status": report_status, "diff": diff, "missing": missing, "failed_chunks": failed_chunks,
+            "report": report}
@@ -0,0 +1,180 @@
+import csv
+import os
+import tempfile
+import time
+import pandas as pd
+from baselinker_api import update_products_text_fields
+from settings import IMPORT_CHUNK_SIZE, MAX_WORKERS
+
+REPORT_COLUMNS = ["row", "product_id", "status", "fields", "error"]
+
+
+def read_chunks(file, filename, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Read a CSV or Excel file as DataFrames of at most `chunk_size` rows, all values as strings
+
+    CSV and XLSX are streamed, legacy XLS files have to be read whole by
+    their engine and are only split afterwards.
+
+    Yields:
+        pandas.DataFrame: The next chunk
+    """
+    if filename.lower().endswith(".csv"):
+        yield from pd.read_csv(file, dtype=str, keep_default_na=False, chunksize=chunk_size)
+    elif filename.lower().endswith(".xlsx"):
+        yield from _read_xlsx_chunks(file, chunk_size)
+    else:
+        df = pd.read_excel(file, dtype=str).fillna("")
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+
+
+def _read_xlsx_chunks(file, chunk_size):
+    """Stream the first sheet of an XLSX file row by row with openpyxl's read-only mode"""
+    from openpyxl import load_workbook
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        headers = [str(value) if value is not None else "" for value in next(rows, [])]
+        chunk = []
+        for row in rows:
+            values = ["" if value is None else str(value) for value in row[:len(headers)]]
+            chunk.append(values + [""] * (len(headers) - len(values)))
+            if len(chunk) >= chunk_size:
+                yield pd.DataFrame(chunk, columns=headers)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=headers)
+    finally:
+        workbook.close()
+
+
+def _same_value(current, new):
+    """Compare a stored text field with an imported value, treating missing as empty"""
+    return str("" if current is None else current) == str(new)
+
+
+def import_file(file, filename, inventory_id, column_map, current_products, id_column="ID",
+                chunk_size=IMPORT_CHUNK_SIZE, max_workers=MAX_WORKERS, report_path=None,
+                progress=None, on_update=None, dry_run=False, skip_blank=True):
+    """
+    Apply an uploaded CSV/XLSX file to product text fields, chunk by chunk
+
+    Each chunk is validated, deduplicated (the first row of a product ID wins),
+    diffed against `current_products`, and only the changed rows are sent
+    through the rate-limited bulk writer. Per-row results are appended to a
+    CSV report on disk as they are produced, so neither the file nor the
+    results are ever held in memory as a whole.
+
+    Args:
+        file (file-like): The uploaded file
+        filename (str): Its name, used to pick the reader
+        inventory_id (int): ID of the inventory
+        column_map (dict): File column to text field ID
+        current_products (dict): Product data keyed by product ID, patched in place
+            by successful writes
+        id_column (str, optional): Column holding the product ID. Defaults to "ID".
+        chunk_size (int, optional): Rows per chunk
+        max_workers (int, optional): Concurrent update calls per chunk
+        report_path (str, optional): Where to write the per-row CSV report. Defaults to a temp file.
+        progress (callable, optional): Called with the running summary after each chunk
+        on_update (callable, optional): Called with (product_id, text_fields) after each successful write
+        dry_run (bool, optional): Diff and report without writing. Defaults to False.
+        skip_blank (bool, optional): Don't clear fields whose cell is empty. Defaults to True.
+
+    Returns:
+        dict: Row counts per status ("updated", "unchanged", "failed", "invalid",
+        "not_found", "duplicate"), "rows", "elapsed", "rows_per_second" and "report_path".
+        On a dry run "updated" counts the rows that would be updated.
+    """
+    if report_path is None:
+        handle, report_path = tempfile.mkstemp(prefix="baselinker_import_", suffix=".csv")
+        os.close(handle)
+
+    summary = {
+        "rows": 0,
+        "updated": 0,
+        "unchanged": 0,
+        "failed": 0,
+        "invalid": 0,
+        "not_found": 0,
+        "duplicate": 0,
+        "elapsed": 0.0,
+        "rows_per_second": 0.0,
+        "report_path": report_path
+    }
+    seen = set()
+    started = time.monotonic()
+
+    with open(report_path, "w", newline="", encoding="utf-8") as report_file:
+        report = csv.writer(report_file)
+        report.writerow(REPORT_COLUMNS)
+
+        for chunk in read_chunks(file, filename, chunk_size):
+            missing_columns = [col for col in [id_column] + list(column_map) if col not in chunk.columns]
+            if missing_columns:
+                raise ValueError(f"Required columns missing from file: {', '.join(missing_columns)}")
+
+            rows = []
+            updates = []
+            for offset, record in enumerate(chunk[[id_column] + list(column_map)].itertuples(index=False)):
+                row_number = summary["rows"] + offset + 1
+                product_id = str(record[0]).strip()
+                if not product_id.isdigit():
+                    rows.append([row_number, product_id, "INVALID", "", "Product ID must be a number"])
+                    continue
+                if product_id in seen:
+                    rows.append([row_number, product_id, "DUPLICATE", "", "Product ID already imported from an earlier row"])
+                    continue
+                seen.add(product_id)
+
+                product = current_products.get(product_id)
+                if product is None:
+                    rows.append([row_number, product_id, "NOT_FOUND", "", "Product not in the inventory"])
+                    continue
+
+                text_fields = product.get("text_fields") or {}
+                changed = {}
+                for field_id, value in zip(column_map.values(), record[1:]):
+                    if skip_blank and value == "":
+                        continue
+                    if not _same_value(text_fields.get(field_id), value):
+                        changed[field_id] = value
+
+                if not changed:
+                    rows.append([row_number, product_id, "UNCHANGED", "", ""])
+                    continue
+                rows.append([row_number, product_id, "PENDING", ",".join(changed), ""])
+                updates.extend((product_id, field_id, value) for field_id, value in changed.items())
+
+            if dry_run:
+                for row in rows:
+                    if row[2] == "PENDING":
+                        row[2] = "WOULD_UPDATE"
+            elif updates:
+                result = update_products_text_fields(inventory_id, updates, current_products, max_workers)
+                for row in rows:
+                    if row[2] != "PENDING":
+                        continue
+                    product_report = result["products"][row[1]]
+                    if product_report["status"] == "FAILED":
+                        row[2] = "FAILED"
+                        row[4] = str(product_report["error"])
+                    else:
+                        row[2] = "UPDATED"
+                        if on_update is not None and product_report["status"] == "SENT":
+                            on_update(row[1], product_report["sent_fields"])
+
+            for row in rows:
+                status = row[2]
+                key = "updated" if status == "WOULD_UPDATE" else status.lower()
+                summary[key] += 1
+            report.writerows(rows)
+
+            summary["rows"] += len(chunk)
+            summary["elapsed"] = time.monotonic() - started
+            summary["rows_per_second"] = summary["rows"] / summary["elapsed"] if summary["elapsed"] else 0.0
+            if progress is not None:
+                progress(dict(summary))
+
+    return summary
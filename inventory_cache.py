@@ -0,0 +1,143 @@
+import threading
+import time
+from product_table import load_inventory_table
+from response_cache import SingleFlight
+from settings import INVENTORY_CACHE_TTL, PRODUCT_CACHE_MAX_AGE
+
+
+class InventoryCache:
+    """Process-wide in-memory inventory cache with a TTL and single-flight loading"""
+
+    def __init__(self, loader=load_inventory_table, ttl=INVENTORY_CACHE_TTL):
+        # loader(inventory_id, max_age) returns {"status", "failed_chunks"} plus the
+        # raw "products" mapping, a ProductTable under "table", or both
+        self.loader = loader
+        self.ttl = ttl
+        self._entries = {}
+        self._single_flight = SingleFlight()
+        self._lock = threading.Lock()
+
+    def get(self, inventory_id, max_age=PRODUCT_CACHE_MAX_AGE):
+        """
+        Get the products of an inventory, loading them at most once at a time
+
+        Args:
+            inventory_id (int): ID of the inventory
+            max_age (float, optional): Passed on to the loader. 0 forces a reload,
+                None returns any cached entry regardless of the TTL.
+
+        Returns:
+            dict: Whatever the loader returned. Shared between callers, so don't
+            modify it directly; use patch_text_fields.
+        """
+        with self._lock:
+            entry = self._entries.get(inventory_id)
+            if entry is not None and max_age != 0:
+                if max_age is None or time.monotonic() - entry["loaded_at"] < self.ttl:
+                    return entry["data"]
+
+        # Concurrent sessions share the result of the first caller's load
+        return self._single_flight.do(inventory_id, lambda: self._load(inventory_id, max_age))
+
+    def peek(self, inventory_id, max_age=PRODUCT_CACHE_MAX_AGE):
+        """
+        Get the cached products of an inventory without ever loading them
+
+        Returns:
+            tuple: (data, stale) where data is None if nothing is cached and stale
+            tells whether get() with the same max_age would load
+        """
+        with self._lock:
+            entry = self._entries.get(inventory_id)
+            if entry is None:
+                return None, True
+            expired = time.monotonic() - entry["loaded_at"] >= self.ttl
+            return entry["data"], max_age == 0 or (max_age is not None and expired)
+
+    def _load(self, inventory_id, max_age):
+        data = self.loader(inventory_id, max_age)
+        with self._lock:
+            # Failed loads are handed to the waiters but never cached
+            if data.get("status") != "ERROR":
+                version = self._entries[inventory_id]["version"] + 1 if inventory_id in self._entries else 1
+                self._entries[inventory_id] = {"data": data, "loaded_at": time.monotonic(), "version": version}
+        return data
+
+    def version(self, inventory_id):
+        """Get a counter that changes whenever the cached inventory is reloaded or patched"""
+        with self._lock:
+            entry = self._entries.get(inventory_id)
+            return entry["version"] if entry is not None else 0
+
+    def patch_text_fields(self, inventory_id, product_id, text_fields):
+        """Apply a successful write to the cached product instead of reloading the inventory"""
+        with self._lock:
+            entry = self._entries.get(inventory_id)
+            if entry is None:
+                return False
+            data = entry["data"]
+            patched = False
+            product = (data.get("products") or {}).get(str(product_id))
+            if product is not None:
+                product.setdefault("text_fields", {}).update(text_fields)
+                patched = True
+            table = data.get("table")
+            if table is not None and table.patch_text_fields(product_id, text_fields):
+                patched = True
+            if patched:
+                entry["version"] += 1
+            return patched
+
+    def apply_changes(self, inventory_id, products, deleted=()):
+        """
+        Apply a refresh delta (see ProductStore.refresh) to the cached inventory
+
+        Returns:
+            bool: False if the inventory isn't cached, so it has to be loaded in full
+        """
+        with self._lock:
+            entry = self._entries.get(inventory_id)
+            if entry is None:
+                return False
+            data = entry["data"]
+            raw = data.get("products")
+            if raw is not None:
+                raw.update(products)
+                for product_id in deleted:
+                    raw.pop(product_id, None)
+            table = data.get("table")
+            if table is not None:
+                table.apply_changes(products, deleted)
+            # The entry is current again
+            entry["loaded_at"] = time.monotonic()
+            if products or deleted:
+                entry["version"] += 1
+            return True
+
+    def put(self, inventory_id, data):
+        """Cache data loaded some other way than through the loader, replacing the entry"""
+        with self._lock:
+            version = self._entries[inventory_id]["version"] + 1 if inventory_id in self._entries else 1
+            self._entries[inventory_id] = {"data": data, "loaded_at": time.monotonic(), "version": version}
+
+    def invalidate(self, inventory_id=None):
+        """Drop one cached inventory, or all of them"""
+        with self._lock:
+            if inventory_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(inventory_id, None)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_inventory_cache():
+    """Get the inventory cache shared by every session in this process"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = InventoryCache()
+    return _default_cache
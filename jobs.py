@@ -0,0 +1,165 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from settings import JOB_MAX_WORKERS
+
+# Finished jobs kept around for sessions that poll them later
+FINISHED_JOBS_KEPT = 100
+
+
+class Job:
+    """A unit of background work with progress that any session can poll"""
+
+    def __init__(self, job_id, key, name):
+        self.id = job_id
+        # Jobs with the same key are deduplicated while one is queued or running
+        self.key = key
+        self.name = name
+        self.status = "QUEUED"
+        self.progress = None
+        self.message = ""
+        self.partial = None
+        self.result = None
+        self.error = None
+        self.created_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        return self.status in ("QUEUED", "RUNNING")
+
+    def update(self, progress=None, message=None, partial=None):
+        """
+        Report progress from inside the job
+
+        Args:
+            progress (float, optional): Share of the work done, 0 to 1
+            message (str, optional): What the job is doing right now
+            partial (optional): Result so far, for pages to render before the job finishes
+        """
+        with self._lock:
+            if progress is not None:
+                self.progress = min(1.0, max(0.0, progress))
+            if message is not None:
+                self.message = message
+            if partial is not None:
+                self.partial = partial
+
+    def eta(self):
+        """Estimated seconds left, extrapolated from the progress so far, or None if unknown"""
+        with self._lock:
+            if self.status != "RUNNING" or not self.progress:
+                return None
+            elapsed = time.monotonic() - self.started_at
+            return elapsed * (1 - self.progress) / self.progress
+
+    def snapshot(self):
+        """Consistent copy of the job's state"""
+        eta = self.eta()
+        with self._lock:
+            end = self.finished_at or time.monotonic()
+            return {
+                "id": self.id,
+                "key": self.key,
+                "name": self.name,
+                "status": self.status,
+                "progress": self.progress,
+                "message": self.message,
+                "partial": self.partial,
+                "result": self.result,
+                "error": self.error,
+                "elapsed": end - self.started_at if self.started_at else 0.0,
+                "eta": eta
+            }
+
+
+class JobRunner:
+    """Process-wide background job scheduler on a bounded worker pool"""
+
+    def __init__(self, max_workers=JOB_MAX_WORKERS, keep=FINISHED_JOBS_KEPT):
+        self.keep = keep
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = OrderedDict()
+        self._active = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, key, func, name=None):
+        """
+        Queue func(job) unless an identical job is already queued or running
+
+        Args:
+            key (hashable): Identifies the work, e.g. ("inventory", 833)
+            func (callable): Runs on a worker thread with the Job as its only argument;
+                its return value becomes job.result, an exception marks the job FAILED
+            name (str, optional): Label shown to users. Defaults to str(key).
+
+        Returns:
+            Job: The new job, or the existing one with the same key
+        """
+        with self._lock:
+            job = self._active.get(key)
+            if job is not None:
+                return job
+            job = Job(next(self._ids), key, name or str(key))
+            self._jobs[job.id] = job
+            self._active[key] = job
+            self._prune()
+        self._executor.submit(self._run, job, func)
+        return job
+
+    def _run(self, job, func):
+        with job._lock:
+            job.status = "RUNNING"
+            job.started_at = time.monotonic()
+        try:
+            result = func(job)
+        except Exception as e:
+            with job._lock:
+                job.status = "FAILED"
+                job.error = str(e)
+        else:
+            with job._lock:
+                job.status = "DONE"
+                job.progress = 1.0
+                job.result = result
+        finally:
+            with job._lock:
+                job.finished_at = time.monotonic()
+            with self._lock:
+                if self._active.get(job.key) is job:
+                    del self._active[job.key]
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond the limit, called with the lock held"""
+        finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(finished) - self.keep)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        """Get a job by ID, or None once it has been forgotten"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def active_jobs(self):
+        """Jobs that are queued or running, oldest first"""
+        with self._lock:
+            return [job for job in self._jobs.values() if job.active]
+
+
+_default_runner = None
+_default_runner_lock = threading.Lock()
+
+
+def get_job_runner():
+    """Get the job runner shared by every session in this process"""
+    global _default_runner
+    if _default_runner is None:
+        with _default_runner_lock:
+            if _default_runner is None:
+                _default_runner = JobRunner()
+    return _default_runner
@@ -1,55 +1,376 @@
 #!/usr/bin/env python3
-from baselinker_api import *
+"""
+Command-line interface for the Baselinker inventory tools
 
-if __name__ == "__main__":
-    products_list = get_inventory_products_list(INVENTORY_ID)
-    print("API Response Structure:")
-    print(json.dumps(products_list, indent=2))
-    
-    if "status" in products_list and products_list["status"] == "SUCCESS":
-        product_ids = []
-        if "products" in products_list:
-            if isinstance(products_list["products"], list):
-                product_ids = [product["id"] for product in products_list["products"]]
-            elif isinstance(products_list["products"], dict):
-                product_ids = list(products_list["products"].keys())
-    
-        print(f"Found {len(product_ids)} products")
-
-        if not product_ids and TARGET_PRODUCT_ID:
-            product_ids = [TARGET_PRODUCT_ID]
-            print(f"Using test product ID: {TARGET_PRODUCT_ID}")
-
-        products_data = get_inventory_products_data(INVENTORY_ID, product_ids)
-        print("\nProduct Data Structure:")
-        print(json.dumps(products_data, indent=2))
-        
-        if "status" in products_data and products_data["status"] == "SUCCESS":
-            table_data = []
-            for product_id, product in products_data["products"].items():
-                extra_field_1 = product.get("text_fields", {}).get(EXTRA_FIELD_1_ID, "")
-                extra_field_2 = product.get("text_fields", {}).get(EXTRA_FIELD_2_ID, "")
-                
-                table_data.append([
-                    product_id,
-                    product.get("sku", ""),
-                    product.get("ean", ""),
-                    product.get("name", ""),
-                    extra_field_1,
-                    extra_field_2
-                ])
-            
-            headers = ["ID", "SKU", "EAN", "Name", "Field 1", "Field 2"]
-            print(tabulate(table_data, headers=headers, tablefmt="grid"))
-            print(f"\nUpdate {EXTRA_FIELD_2_ID} for product ID {TARGET_PRODUCT_ID}:")
-            new_value = input("Enter new value for Field 2: ")
-            update_result = update_product_extra_field(INVENTORY_ID, TARGET_PRODUCT_ID, EXTRA_FIELD_2_ID, new_value)
-            
-            if "status" in update_result and update_result["status"] == "SUCCESS":
-                print(f"Successfully updated product ID {TARGET_PRODUCT_ID} with new Field 2 value: {new_value}")
-            else:
-                print(f"Failed to update product: {update_result}")
-        else:
-            print(f"Failed to get product data: {products_data}")
+    python main.py                          Show the inventory and update the target product
+    python main.py export -f csv -o out.csv Stream every product to NDJSON, CSV or Parquet
+    python main.py update changes.csv       Apply a CSV/XLSX file to product text fields
+    python main.py sync                     Sync inventories into the local product cache
+"""
+import argparse
+import csv
+import json
+import sys
+from baselinker_api import (
+    BaselinkerAPIError,
+    PRODUCTS_DATA_CHUNK_SIZE,
+    fetch_inventory_products_data,
+    iter_inventory_products,
+    stream_inventory_products_data,
+    update_product_extra_field
+)
+from product_store import load_inventory_products, get_default_store, field_value
+from settings import (
+    INVENTORY_ID,
+    TARGET_PRODUCT_ID,
+    EXTRA_FIELD_1_ID,
+    EXTRA_FIELD_2_ID,
+    PRODUCT_TABLE_FIELDS
+)
+
+
+def _product_id_batches(inventory_id, chunk_size=PRODUCTS_DATA_CHUNK_SIZE):
+    """Walk the product list page by page, yielding product IDs in getInventoryProductsData sized batches"""
+    batch = []
+    for product_id, _ in iter_inventory_products(inventory_id):
+        batch.append(product_id)
+        if len(batch) >= chunk_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class NdjsonWriter:
+    """One JSON object per line"""
+
+    def __init__(self, output, columns):
+        self.output = output
+
+    def write(self, rows):
+        for row in rows:
+            self.output.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.output.flush()
+
+
+class CsvWriter:
+    """CSV with a header row"""
+
+    def __init__(self, output, columns):
+        self.output = output
+        self.writer = csv.DictWriter(output, fieldnames=columns)
+        self.writer.writeheader()
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.output.flush()
+
+
+class ParquetWriter:
+    """Parquet file with one row group per batch of products, needs pyarrow"""
+
+    def __init__(self, output, columns):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet export needs pyarrow: pip install pyarrow")
+        self.pa = pa
+        self.schema = pa.schema([(column, pa.string()) for column in columns])
+        self.writer = pq.ParquetWriter(output, self.schema)
+
+    def write(self, rows):
+        if rows:
+            self.writer.write_table(self.pa.Table.from_pylist(rows, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+EXPORT_WRITERS = {
+    "ndjson": NdjsonWriter,
+    "csv": CsvWriter,
+    "parquet": ParquetWriter
+}
+
+
+def _parse_fields(fields):
+    """Turn ["Name=text_fields.name", "sku"] into {"Name": "text_fields.name", "sku": "sku"}"""
+    projection = {}
+    for field in fields:
+        column, _, path = field.partition("=")
+        projection[column] = path or column
+    return projection
+
+
+def export_products(inventory_id, output, export_format="ndjson", fields=None):
+    """
+    Stream every product of an inventory to `output`, one data chunk at a time
+
+    Memory use is bounded by one getInventoryProductsData chunk regardless of
+    the inventory size.
+
+    Args:
+        inventory_id (int): ID of the inventory
+        output (file-like or str): Text stream for NDJSON/CSV, path or binary stream for Parquet
+        export_format (str, optional): "ndjson", "csv" or "parquet". Defaults to "ndjson".
+        fields (dict, optional): Column name to dotted product field. Defaults to
+            settings.PRODUCT_TABLE_FIELDS, except for NDJSON where it defaults to
+            the full product.
+
+    Returns:
+        int: Number of exported products
+    """
+    if fields is None and export_format != "ndjson":
+        fields = PRODUCT_TABLE_FIELDS
+    projection = {column: path.split(".") for column, path in (fields or {}).items()}
+    columns = ["ID"] + [column for column in projection if column != "ID"]
+
+    writer = EXPORT_WRITERS[export_format](output, columns)
+    exported = 0
+    try:
+        for batch in _product_id_batches(inventory_id):
+            rows = []
+            for product_id, product in stream_inventory_products_data(inventory_id, batch):
+                if projection:
+                    row = {"ID": str(product_id)}
+                    for column, path in projection.items():
+                        row[column] = field_value(product, path)
+                else:
+                    row = dict(product, id=product_id)
+                rows.append(row)
+            writer.write(rows)
+            exported += len(rows)
+    finally:
+        writer.close()
+    return exported
+
+
+def cmd_show(args):
+    """Print the cached inventory as a table and update Field 2 of the target product"""
+    from tabulate import tabulate
+    from product_table import ProductTable
+
+    try:
+        products_data = load_inventory_products(args.inventory_id)
+    except BaselinkerAPIError as e:
+        print(f"Failed to get products list: {e.response}")
+        return 1
+
+    print(f"Found {len(products_data['products'])} products")
+
+    if not products_data["products"] and TARGET_PRODUCT_ID:
+        print(f"Using test product ID: {TARGET_PRODUCT_ID}")
+        products_data = fetch_inventory_products_data(args.inventory_id, [TARGET_PRODUCT_ID])
+
+    for failed_chunk in products_data["failed_chunks"]:
+        print(f"Failed to get data for {len(failed_chunk['product_ids'])} products: {failed_chunk['error']}")
+
+    if products_data["status"] == "ERROR":
+        print(f"Failed to get product data: {products_data}")
+        return 1
+
+    table = ProductTable.from_products(products_data["products"], {
+        "SKU": "sku",
+        "EAN": "ean",
+        "Name": "text_fields.name",
+        "Field 1": f"text_fields.{EXTRA_FIELD_1_ID}",
+        "Field 2": f"text_fields.{EXTRA_FIELD_2_ID}"
+    }, release=True)
+    print(tabulate(table.df.head(args.limit), headers="keys", tablefmt="grid", showindex=False))
+    if len(table) > args.limit:
+        print(f"... {len(table) - args.limit} more, use `export` for the full inventory")
+
+    print(f"\nUpdate {EXTRA_FIELD_2_ID} for product ID {TARGET_PRODUCT_ID}:")
+    new_value = input("Enter new value for Field 2: ")
+    update_result = update_product_extra_field(args.inventory_id, TARGET_PRODUCT_ID, EXTRA_FIELD_2_ID, new_value)
+
+    if "status" in update_result and update_result["status"] == "SUCCESS":
+        get_default_store().update_text_fields(args.inventory_id, TARGET_PRODUCT_ID, {EXTRA_FIELD_2_ID: new_value})
+        print(f"Successfully updated product ID {TARGET_PRODUCT_ID} with new Field 2 value: {new_value}")
+        return 0
+    print(f"Failed to update product: {update_result}")
+    return 1
+
+
+def cmd_export(args):
+    """Stream the inventory to a file or stdout"""
+    fields = _parse_fields(args.field) or None
+
+    if args.format == "parquet":
+        if not args.output:
+            print("Parquet export needs --output", file=sys.stderr)
+            return 2
+        output = args.output
+        close = None
+    elif args.output:
+        output = close = open(args.output, "w", newline="", encoding="utf-8")
     else:
-        print(f"Failed to get products list: {products_list}")
+        output = sys.stdout
+        close = None
+
+    try:
+        exported = export_products(args.inventory_id, output, args.format, fields)
+    except BaselinkerAPIError as e:
+        print(f"Export failed: {e.response}", file=sys.stderr)
+        return 1
+    finally:
+        if close is not None:
+            close.close()
+
+    print(f"Exported {exported} products", file=sys.stderr)
+    return 0
+
+
+def cmd_update(args):
+    """Apply a CSV/XLSX file to product text fields without prompting"""
+    from importer import import_file
+
+    column_map = {}
+    for mapping in args.column:
+        column, _, field_id = mapping.partition("=")
+        column_map[column] = field_id or column
+    if not column_map:
+        column_map = {"Extra Field 484": EXTRA_FIELD_2_ID}
+
+    try:
+        current_products = load_inventory_products(args.inventory_id)["products"]
+    except BaselinkerAPIError as e:
+        print(f"Failed to load products: {e.response}", file=sys.stderr)
+        return 1
+
+    store = get_default_store()
+
+    def on_update(product_id, text_fields):
+        store.update_text_fields(args.inventory_id, product_id, text_fields)
+
+    def progress(summary):
+        if args.verbose:
+            print(f"{summary['rows']} rows, {summary['updated']} updated, {summary['failed']} failed",
+                  file=sys.stderr)
+
+    with open(args.file, "rb") as file:
+        summary = import_file(
+            file,
+            args.file,
+            args.inventory_id,
+            column_map,
+            current_products,
+            id_column=args.id_column,
+            report_path=args.report,
+            progress=progress,
+            on_update=on_update,
+            dry_run=args.dry_run,
+            skip_blank=not args.clear_blank
+        )
+
+    print(json.dumps(summary))
+    return 1 if summary["failed"] else 0
+
+
+def cmd_sync(args):
+    """Sync inventories into the local product cache"""
+    from sync_engine import SyncEngine
+    from settings import SYNC_INVENTORY_IDS
+
+    inventory_ids = args.inventory_id or None
+    failed = False
+    if args.incremental:
+        store = get_default_store()
+        try:
+            inventory_ids = inventory_ids or SYNC_INVENTORY_IDS or SyncEngine(store).discover()
+            results = {inventory_id: store.refresh(inventory_id) for inventory_id in inventory_ids}
+        except BaselinkerAPIError as e:
+            print(f"Refresh failed: {e.response}", file=sys.stderr)
+            return 1
+
+        # Inventories whose change log couldn't be read get a full sync below
+        inventory_ids = []
+        for inventory_id, result in results.items():
+            if result["error"] is not None:
+                print(f"{inventory_id}: change log unavailable ({result['error']}), running a full sync",
+                      file=sys.stderr)
+                inventory_ids.append(inventory_id)
+                continue
+            failed = failed or result["status"] == "ERROR"
+            print(json.dumps({
+                "inventory_id": inventory_id,
+                "status": result["status"],
+                "full": result["full"],
+                "changed": len(result["products"] or {}),
+                "deleted": len(result["deleted"] or []),
+                "failed_chunks": result["failed_chunks"],
+                "error": None
+            }))
+        if not inventory_ids:
+            return 1 if failed else 0
+
+    def progress(snapshot):
+        for inventory_id, state in snapshot.items():
+            print(f"{inventory_id}: {state['status']} {state['pages']} pages, "
+                  f"{state['chunks_done']}/{state['chunks_total']} chunks", file=sys.stderr)
+
+    try:
+        results = SyncEngine().run(inventory_ids, progress=progress if args.verbose else None)
+    except BaselinkerAPIError as e:
+        print(f"Failed to list inventories: {e.response}", file=sys.stderr)
+        return 1
+
+    for inventory_id, result in results.items():
+        print(json.dumps({"inventory_id": inventory_id, **result}))
+    return 1 if failed or any(result["status"] == "ERROR" for result in results.values()) else 0
+
+
+def build_parser():
+    """Argument parser with one subparser per command"""
+    parser = argparse.ArgumentParser(description="Baselinker inventory tools")
+    parser.set_defaults(command=cmd_show, inventory_id=INVENTORY_ID, limit=50)
+    subparsers = parser.add_subparsers(title="commands")
+
+    show = subparsers.add_parser("show", help="show the inventory and update the target product (default)")
+    show.add_argument("--inventory-id", type=int, default=INVENTORY_ID)
+    show.add_argument("--limit", type=int, default=50, help="rows to print (default 50)")
+    show.set_defaults(command=cmd_show)
+
+    export = subparsers.add_parser("export", help="stream products to NDJSON, CSV or Parquet")
+    export.add_argument("--inventory-id", type=int, default=INVENTORY_ID)
+    export.add_argument("-f", "--format", choices=sorted(EXPORT_WRITERS), default="ndjson")
+    export.add_argument("-o", "--output", help="output file (default stdout, required for Parquet)")
+    export.add_argument("--field", action="append", default=[], metavar="COLUMN=PATH",
+                        help="column and dotted product field, e.g. Name=text_fields.name; repeatable")
+    export.set_defaults(command=cmd_export)
+
+    update = subparsers.add_parser("update", help="apply a CSV/XLSX file to product text fields")
+    update.add_argument("file")
+    update.add_argument("--inventory-id", type=int, default=INVENTORY_ID)
+    update.add_argument("--column", action="append", default=[], metavar="COLUMN=FIELD_ID",
+                        help=f"file column and text field ID; repeatable (default \"Extra Field 484={EXTRA_FIELD_2_ID}\")")
+    update.add_argument("--id-column", default="ID")
+    update.add_argument("--report", help="where to write the per-row CSV report (default a temp file)")
+    update.add_argument("--dry-run", action="store_true", help="report the changes without writing them")
+    update.add_argument("--clear-blank", action="store_true", help="clear fields whose cell is empty")
+    update.add_argument("-v", "--verbose", action="store_true")
+    update.set_defaults(command=cmd_update)
+
+    sync = subparsers.add_parser("sync", help="sync inventories into the local product cache")
+    sync.add_argument("--inventory-id", type=int, action="append", default=[],
+                      help="inventory to sync; repeatable (default settings.SYNC_INVENTORY_IDS or all)")
+    sync.add_argument("--incremental", action="store_true",
+                      help="fetch only the products in the change log since the last sync")
+    sync.add_argument("-v", "--verbose", action="store_true")
+    sync.set_defaults(command=cmd_sync)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.command(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+import functools
+import heapq
+import itertools
+import json
+import logging
+import threading
+import time
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+logger = logging.getLogger("baselinker.metrics")
+
+
+def _new_stats():
+    return {
+        "calls": 0,
+        "errors": 0,
+        "throttled": 0,
+        "retries": 0,
+        "request_bytes": 0,
+        "response_bytes": 0,
+        "seconds": 0.0,
+        "max_seconds": 0.0,
+        "buckets": [0] * len(LATENCY_BUCKETS),
+        "error_codes": {}
+    }
+
+
+class MetricsRegistry:
+    """Per-method call statistics for the API and Sheets layers, with pluggable listeners"""
+
+    def __init__(self, slowest_size=20):
+        self.slowest_size = slowest_size
+        self._stats = {}
+        self._slowest = []
+        self._sequence = itertools.count()
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def record(self, layer, method, seconds, request_bytes=0, response_bytes=0,
+               retries=0, throttled=0, error_code=None):
+        """Record one finished call and pass it on to the listeners"""
+        call = {
+            "layer": layer,
+            "method": method,
+            "seconds": seconds,
+            "request_bytes": request_bytes,
+            "response_bytes": response_bytes,
+            "retries": retries,
+            "throttled": throttled,
+            "error_code": error_code,
+            "timestamp": time.time()
+        }
+        with self._lock:
+            stats = self._stats.setdefault((layer, method), _new_stats())
+            stats["calls"] += 1
+            stats["retries"] += retries
+            stats["throttled"] += throttled
+            stats["request_bytes"] += request_bytes
+            stats["response_bytes"] += response_bytes
+            stats["seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    stats["buckets"][i] += 1
+                    break
+            if error_code is not None:
+                stats["errors"] += 1
+                stats["error_codes"][error_code] = stats["error_codes"].get(error_code, 0) + 1
+
+            # Min-heap of the slowest calls seen so far
+            entry = (seconds, next(self._sequence), call)
+            if len(self._slowest) < self.slowest_size:
+                heapq.heappush(self._slowest, entry)
+            elif seconds > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            try:
+                listener(call)
+            except Exception:
+                logger.exception("Metrics listener failed")
+
+    def add_listener(self, listener):
+        """Call listener(call) for every recorded call"""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """Stop calling a listener added with add_listener"""
+        with self._lock:
+            self._listeners.remove(listener)
+
+    def snapshot(self):
+        """Get a copy of the per-method statistics keyed by (layer, method)"""
+        with self._lock:
+            return {
+                key: dict(stats, buckets=list(stats["buckets"]), error_codes=dict(stats["error_codes"]))
+                for key, stats in self._stats.items()
+            }
+
+    def slowest_calls(self):
+        """Get the slowest recorded calls, slowest first"""
+        with self._lock:
+            return [call for _, _, call in sorted(self._slowest, key=lambda entry: entry[:2], reverse=True)]
+
+    def reset(self):
+        """Forget everything recorded so far"""
+        with self._lock:
+            self._stats.clear()
+            self._slowest = []
+
+    def render_prometheus(self, prefix="baselinker"):
+        """Render the statistics in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+
+        def family(name, kind, help_text, field):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for (layer, method), stats in sorted(snapshot.items()):
+                lines.append(f'{prefix}_{name}{{layer="{layer}",method="{method}"}} {stats[field]}')
+
+        family("calls_total", "counter", "Finished calls", "calls")
+        family("errors_total", "counter", "Calls that ended in an error", "errors")
+        family("throttled_total", "counter", "Throttling responses received", "throttled")
+        family("retries_total", "counter", "Retried attempts", "retries")
+        family("request_bytes_total", "counter", "Bytes sent", "request_bytes")
+        family("response_bytes_total", "counter", "Bytes received", "response_bytes")
+
+        name = f"{prefix}_call_duration_seconds"
+        lines.append(f"# HELP {name} Call latency")
+        lines.append(f"# TYPE {name} histogram")
+        for (layer, method), stats in sorted(snapshot.items()):
+            labels = f'layer="{layer}",method="{method}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, stats["buckets"]):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {stats["calls"]}')
+            lines.append(f"{name}_sum{{{labels}}} {stats['seconds']}")
+            lines.append(f"{name}_count{{{labels}}} {stats['calls']}")
+        return "\n".join(lines) + "\n"
+
+
+# Registry shared by every instrumented call in this process
+registry = MetricsRegistry()
+
+
+def log_call(call):
+    """Listener writing each call as one JSON line to the baselinker.metrics logger"""
+    logger.info(json.dumps(call, default=str))
+
+
+def enable_structured_log():
+    """Log every recorded call as structured JSON"""
+    registry.add_listener(log_call)
+
+
+# Transfer totals of the instrumented calls running on each thread, innermost last
+_active = threading.local()
+
+
+def record_transfer(request_bytes=0, response_bytes=0, throttled=0):
+    """
+    Add one HTTP exchange to every instrumented call running on this thread
+
+    Meant for response hooks of HTTP sessions that instrumented functions use
+    indirectly, such as the gspread client's. Does nothing outside such calls.
+    """
+    for transfer in getattr(_active, "calls", ()):
+        transfer["request_bytes"] += request_bytes
+        transfer["response_bytes"] += response_bytes
+        transfer["throttled"] += throttled
+
+
+def instrumented(layer, method=None):
+    """
+    Decorator timing every call of a function and recording exceptions as errors
+
+    Bytes and throttling responses reported with record_transfer while the
+    call runs are recorded with it. An exception carrying an HTTP 429
+    response (e.g. gspread's APIError) is recorded as TOO_MANY_REQUESTS and
+    counted as throttled.
+    """
+    def decorator(func):
+        name = method or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            transfer = {"request_bytes": 0, "response_bytes": 0, "throttled": 0}
+            calls = _active.__dict__.setdefault("calls", [])
+            calls.append(transfer)
+            started = time.monotonic()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if getattr(getattr(e, "response", None), "status_code", None) == 429:
+                    transfer["throttled"] = max(transfer["throttled"], 1)
+                    error_code = "TOO_MANY_REQUESTS"
+                else:
+                    error_code = type(e).__name__
+                registry.record(layer, name, time.monotonic() - started, error_code=error_code, **transfer)
+                raise
+            finally:
+                calls.pop()
+            registry.record(layer, name, time.monotonic() - started, **transfer)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,339 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from baselinker_api import (
+    PRODUCT_LOGS_PAGE_SIZE,
+    iter_inventory_products,
+    fetch_inventory_products_data,
+    get_inventory_product_logs
+)
+from settings import PRODUCT_CACHE_PATH, PRODUCT_CACHE_MAX_AGE, PRODUCT_LOG_MAX_PAGES
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    inventory_id INTEGER NOT NULL,
+    product_id TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (inventory_id, product_id)
+);
+CREATE TABLE IF NOT EXISTS inventory_sync (
+    inventory_id INTEGER PRIMARY KEY,
+    synced_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS inventory_log_marks (
+    inventory_id INTEGER PRIMARY KEY,
+    log_date INTEGER NOT NULL
+);
+"""
+
+# A full sync starts reading change logs this many seconds before it began,
+# so events logged while it ran (or behind a skewed clock) are not missed
+LOG_MARK_OVERLAP = 60
+
+
+def field_value(product, path):
+    """Follow a pre-split dotted path into a product, returning "" when it's missing"""
+    value = product
+    for key in path:
+        if not isinstance(value, dict):
+            return ""
+        value = value.get(key)
+    if value is None:
+        return ""
+    return value if isinstance(value, str) else str(value)
+
+
+def fingerprint(list_product):
+    """Hash the list-level data of a product so changes can be detected cheaply"""
+    encoded = json.dumps(list_product, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+class ProductStore:
+    """Persistent on-disk product cache keyed by inventory and product ID"""
+
+    def __init__(self, path=PRODUCT_CACHE_PATH):
+        self.path = path
+        # Streamlit runs sessions on separate threads, so one connection is shared behind a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def last_synced(self, inventory_id):
+        """Get the time of the last completed sync, or None if never synced"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT synced_at FROM inventory_sync WHERE inventory_id = ?", (inventory_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def log_mark(self, inventory_id):
+        """Get the Unix time change logs are read from on the next refresh, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT log_date FROM inventory_log_marks WHERE inventory_id = ?", (inventory_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_log_mark(self, inventory_id, log_date):
+        """Move the change log high-water mark, None drops it so the next refresh is a full sync"""
+        with self._lock, self._conn:
+            if log_date is None:
+                self._conn.execute("DELETE FROM inventory_log_marks WHERE inventory_id = ?", (inventory_id,))
+            else:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO inventory_log_marks (inventory_id, log_date) VALUES (?, ?)",
+                    (inventory_id, int(log_date))
+                )
+
+    def _fingerprints(self, inventory_id):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT product_id, fingerprint FROM products WHERE inventory_id = ?", (inventory_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def diff(self, inventory_id, fingerprints):
+        """
+        Compare list-level fingerprints with the stored ones
+
+        Returns:
+            tuple: (changed, deleted) product ID lists, where changed covers new products too
+        """
+        stored = self._fingerprints(inventory_id)
+        changed = [product_id for product_id, fp in fingerprints.items() if stored.get(product_id) != fp]
+        deleted = [product_id for product_id in stored if product_id not in fingerprints]
+        return changed, deleted
+
+    def save(self, inventory_id, fingerprints, products, deleted):
+        """
+        Store fetched products, remove deleted ones and mark the inventory as synced
+
+        Args:
+            inventory_id (int): ID of the inventory
+            fingerprints (dict): List-level fingerprints of every current product
+            products (dict): Detailed data of the products that were fetched
+            deleted (list): IDs of products that no longer exist
+
+        Returns:
+            dict: {"added", "updated", "deleted"}
+        """
+        stored = self._fingerprints(inventory_id)
+        now = time.time()
+        rows = [
+            (inventory_id, product_id, fingerprints[product_id], json.dumps(product), now)
+            for product_id, product in products.items()
+            if product_id in fingerprints
+        ]
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO products (inventory_id, product_id, fingerprint, data, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.executemany(
+                "DELETE FROM products WHERE inventory_id = ? AND product_id = ?",
+                [(inventory_id, product_id) for product_id in deleted]
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO inventory_sync (inventory_id, synced_at) VALUES (?, ?)",
+                (inventory_id, now)
+            )
+
+        added = sum(1 for row in rows if row[1] not in stored)
+        return {"added": added, "updated": len(rows) - added, "deleted": len(deleted)}
+
+    def sync(self, inventory_id):
+        """
+        Bring the cached inventory up to date with Baselinker
+
+        Walks the full product list, downloads detailed data only for products
+        that are new or whose list-level data (SKU, EAN, name, prices, stock)
+        changed since the last sync, and removes products that no longer exist.
+        Products whose data could not be fetched keep their old fingerprint and
+        are retried on the next sync.
+
+        Returns:
+            dict: {"status", "added", "updated", "deleted", "unchanged", "failed_chunks"}
+        """
+        log_mark = time.time() - LOG_MARK_OVERLAP
+        fingerprints = {}
+        for product_id, list_product in iter_inventory_products(inventory_id):
+            fingerprints[product_id] = fingerprint(list_product)
+
+        changed, deleted = self.diff(inventory_id, fingerprints)
+        products_data = fetch_inventory_products_data(inventory_id, changed)
+        result = self.save(inventory_id, fingerprints, products_data["products"], deleted)
+        # Products that failed to fetch won't show up in the change log, only a full sync retries them
+        self.set_log_mark(inventory_id, None if products_data["failed_chunks"] else log_mark)
+        result.update({
+            "status": products_data["status"],
+            "unchanged": len(fingerprints) - len(changed),
+            "failed_chunks": products_data["failed_chunks"]
+        })
+        return result
+
+    def refresh(self, inventory_id, max_pages=PRODUCT_LOG_MAX_PAGES):
+        """
+        Apply the products changed since the last refresh, found through the change log
+
+        Reads getInventoryProductLogs from the stored high-water mark and
+        downloads detailed data only for the products it mentions, so the
+        cost follows the number of changes rather than the catalog size.
+        Logged products that are no longer returned have been deleted.
+        Refreshed products get an empty fingerprint, so the next full sync
+        fetches them once more and re-establishes their list-level fingerprint.
+        Falls back to a full sync when there is no mark yet (never synced, or
+        the last sync had failed chunks) or more than `max_pages` pages of
+        events have piled up.
+
+        The log is read without a product_id, for every product at once.
+        Baselinker documents product_id as required, so the API may reject
+        that call. Nothing is changed then and the result has status "ERROR"
+        with the response under "error"; callers should run a full sync instead.
+
+        Returns:
+            dict: {"status", "full", "products", "deleted", "failed_chunks", "error"}.
+            Unless "full" is True (the inventory was synced in full), "products"
+            holds the new or changed products and "deleted" the removed IDs,
+            ready to apply to a copy loaded earlier.
+        """
+        mark = self.log_mark(inventory_id)
+        if mark is None:
+            return self._full_refresh(inventory_id)
+
+        product_ids = set()
+        newest = mark
+        page = 1
+        while True:
+            response = get_inventory_product_logs(date_from=mark, page=page)
+            if response.get("status") != "SUCCESS":
+                return {"status": "ERROR", "full": False, "products": {}, "deleted": [],
+                        "failed_chunks": [], "error": response}
+            logs = response.get("logs") or []
+            for log in logs:
+                product_ids.add(str(log["product_id"]))
+                newest = max(newest, int(log.get("date") or 0))
+            if len(logs) < PRODUCT_LOGS_PAGE_SIZE:
+                break
+            if page >= max_pages:
+                return self._full_refresh(inventory_id)
+            page += 1
+
+        products_data = fetch_inventory_products_data(inventory_id, sorted(product_ids))
+        products = products_data["products"]
+        failed = {product_id for chunk in products_data["failed_chunks"] for product_id in chunk["product_ids"]}
+        stored = self._fingerprints(inventory_id)
+        # The log covers every inventory, so only products this inventory had count as deleted
+        deleted = [
+            product_id for product_id in product_ids
+            if product_id not in products and product_id not in failed and product_id in stored
+        ]
+
+        self.save(inventory_id, dict.fromkeys(products, ""), products, deleted)
+        if not failed:
+            # Failed products are logged again from the old mark next time
+            self.set_log_mark(inventory_id, newest)
+        return {
+            "status": products_data["status"],
+            "full": False,
+            "products": products,
+            "deleted": deleted,
+            "failed_chunks": products_data["failed_chunks"],
+            "error": None
+        }
+
+    def _full_refresh(self, inventory_id):
+        """refresh() result of a full sync"""
+        result = self.sync(inventory_id)
+        return {
+            "status": result["status"],
+            "full": True,
+            "products": None,
+            "deleted": None,
+            "failed_chunks": result["failed_chunks"],
+            "error": None
+        }
+
+    def get_products(self, inventory_id, max_age=PRODUCT_CACHE_MAX_AGE):
+        """
+        Get all cached products of an inventory, syncing first if the cache is stale
+
+        Args:
+            inventory_id (int): ID of the inventory
+            max_age (float, optional): Maximum age of the cache in seconds. None never syncs
+                an inventory that has been synced before, 0 always syncs.
+
+        Returns:
+            dict: {"status", "products", "failed_chunks"}, the same shape as
+            baselinker_api.fetch_inventory_products_data
+        """
+        status = "SUCCESS"
+        failed_chunks = []
+        synced_at = self.last_synced(inventory_id)
+        if synced_at is None or (max_age is not None and time.time() - synced_at > max_age):
+            result = self.sync(inventory_id)
+            status = result["status"]
+            failed_chunks = result["failed_chunks"]
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT product_id, data FROM products WHERE inventory_id = ?", (inventory_id,)
+            ).fetchall()
+        products = {product_id: json.loads(data) for product_id, data in rows}
+        if status == "ERROR" and products:
+            # Serve what was cached before rather than nothing
+            status = "PARTIAL"
+        return {"status": status, "products": products, "failed_chunks": failed_chunks}
+
+    def update_text_fields(self, inventory_id, product_id, text_fields):
+        """Patch a cached product after a successful write so reads don't go stale"""
+        product_id = str(product_id)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT data FROM products WHERE inventory_id = ? AND product_id = ?",
+                (inventory_id, product_id)
+            ).fetchone()
+            if row is None:
+                return False
+            product = json.loads(row[0])
+            product.setdefault("text_fields", {}).update(text_fields)
+            self._conn.execute(
+                "UPDATE products SET data = ?, updated_at = ? WHERE inventory_id = ? AND product_id = ?",
+                (json.dumps(product), time.time(), inventory_id, product_id)
+            )
+        return True
+
+    def close(self):
+        """Close the database connection"""
+        self._conn.close()
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_store():
+    """Get the shared product store at PRODUCT_CACHE_PATH"""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = ProductStore()
+    return _default_store
+
+
+def load_inventory_products(inventory_id, max_age=PRODUCT_CACHE_MAX_AGE):
+    """Get all products of an inventory from the shared store"""
+    return get_default_store().get_products(inventory_id, max_age)
+
+
+def refresh_inventory_products(inventory_id):
+    """Apply the logged changes of an inventory to the shared store and return the delta"""
+    return get_default_store().refresh(inventory_id)
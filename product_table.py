@@ -0,0 +1,130 @@
+import pandas as pd
+from columns import compact_column
+from product_store import load_inventory_products, field_value
+from settings import PRODUCT_TABLE_FIELDS, PRODUCT_CACHE_MAX_AGE
+
+
+class ProductTable:
+    """Compact product table with an O(1) product ID index"""
+
+    def __init__(self, df, fields):
+        self.df = df
+        self.fields = fields
+
+    @classmethod
+    def from_products(cls, products, fields=None, release=False):
+        """
+        Build the table column by column from getInventoryProductsData products
+
+        Args:
+            products (dict): Product data keyed by product ID
+            fields (dict, optional): Column name to dotted product field, e.g.
+                {"Name": "text_fields.name"}. Defaults to settings.PRODUCT_TABLE_FIELDS.
+            release (bool, optional): Empty `products` once the table is built so the
+                raw response can be garbage collected. Defaults to False.
+
+        Returns:
+            ProductTable: The table, with an "ID" column and the IDs as index
+        """
+        if fields is None:
+            fields = PRODUCT_TABLE_FIELDS
+        paths = [(column, path.split(".")) for column, path in fields.items()]
+
+        ids = []
+        columns = {column: [] for column in fields}
+        for product_id, product in products.items():
+            ids.append(str(product_id))
+            for column, path in paths:
+                columns[column].append(field_value(product, path))
+
+        if release:
+            products.clear()
+
+        data = {"ID": pd.array(ids, dtype="string")}
+        for column, values in columns.items():
+            data[column] = compact_column(values)
+        df = pd.DataFrame(data, index=pd.Index(ids, dtype="string"))
+        return cls(df, fields)
+
+    def __len__(self):
+        return len(self.df)
+
+    def __contains__(self, product_id):
+        return str(product_id) in self.df.index
+
+    def value(self, product_id, column, default=None):
+        """Get one cell by product ID without scanning the table"""
+        product_id = str(product_id)
+        if product_id not in self.df.index:
+            return default
+        return self.df.at[product_id, column]
+
+    def set_value(self, product_id, column, value):
+        """Set one cell by product ID, extending the categories if needed"""
+        value = "" if value is None else str(value)
+        series = self.df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype) and value not in series.cat.categories:
+            self.df[column] = series.cat.add_categories([value])
+        self.df.at[str(product_id), column] = value
+
+    def apply_changes(self, products, deleted=()):
+        """
+        Apply new, changed and deleted products without rebuilding the table
+
+        Changed rows are updated in place, new ones appended and deleted ones
+        dropped, so the cost follows the size of the change.
+
+        Args:
+            products (dict): New or changed product data keyed by product ID
+            deleted (iterable, optional): IDs of removed products
+        """
+        paths = [(column, path.split(".")) for column, path in self.fields.items()]
+        new_products = {}
+        for product_id, product in products.items():
+            if product_id not in self:
+                new_products[product_id] = product
+                continue
+            for column, path in paths:
+                self.set_value(product_id, column, field_value(product, path))
+
+        df = self.df
+        removed = [product_id for product_id in map(str, deleted) if product_id in df.index]
+        if removed:
+            df = df.drop(index=removed)
+        if new_products:
+            added = ProductTable.from_products(new_products, self.fields).df
+            for column in self.fields:
+                series = df[column]
+                if isinstance(series.dtype, pd.CategoricalDtype):
+                    # Give the new rows the table's categories, extended by their values,
+                    # so the column stays categorical through the concat
+                    categories = series.cat.categories.union(pd.Index(added[column].astype(str).unique()), sort=False)
+                    df[column] = series.cat.set_categories(categories)
+                    added[column] = pd.Categorical(added[column].astype(str), categories=categories)
+            df = pd.concat([df, added])
+        self.df = df
+
+    def patch_text_fields(self, product_id, text_fields):
+        """Apply written text field values to the mapped columns"""
+        if product_id not in self:
+            return False
+        for column, path in self.fields.items():
+            section, _, key = path.partition(".")
+            if section == "text_fields" and key in text_fields:
+                self.set_value(product_id, column, text_fields[key])
+        return True
+
+
+def load_inventory_table(inventory_id, max_age=PRODUCT_CACHE_MAX_AGE, fields=None):
+    """
+    Load an inventory from the product store straight into a ProductTable
+
+    Returns:
+        dict: {"status", "table", "failed_chunks"}, with the raw products released
+    """
+    products_data = load_inventory_products(inventory_id, max_age)
+    return {
+        "status": products_data["status"],
+        "table": ProductTable.from_products(products_data.pop("products"), fields, release=True),
+        "failed_chunks": products_data["failed_chunks"]
+    }
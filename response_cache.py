@@ -0,0 +1,184 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from settings import RESPONSE_CACHE_MAX_ENTRIES
+
+# Seconds a successful response of each read-only method stays cached
+DEFAULT_TTLS = {
+    "getInventories": 300,
+    "getInventoryProductsList": 60,
+    "getInventoryProductsData": 60
+}
+
+# Write methods and the read methods whose entries they make stale
+INVALIDATING_METHODS = {
+    "addInventoryProduct": ("getInventoryProductsList", "getInventoryProductsData"),
+    "updateInventoryProductsStock": ("getInventoryProductsList", "getInventoryProductsData"),
+    "updateInventoryProductsPrices": ("getInventoryProductsList", "getInventoryProductsData")
+}
+
+
+class _Flight:
+    """One in-progress call that concurrent callers wait on"""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+
+    def finish(self, result=None, error=None):
+        self._result = result
+        self._error = error
+        self._done.set()
+
+    def wait(self):
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution"""
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        """Call func(), or wait for the result of the identical call already running"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            return flight.wait()
+
+        try:
+            result = func()
+        except BaseException as e:
+            with self._lock:
+                del self._flights[key]
+            flight.finish(error=e)
+            raise
+
+        with self._lock:
+            del self._flights[key]
+        flight.finish(result=result)
+        return result
+
+
+def canonical_key(method, parameters):
+    """Key a call by method and parameters, independent of parameter order"""
+    return method, json.dumps(parameters or {}, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class ResponseCache:
+    """Per-method TTL and LRU cache of read-only connector responses with single-flight loading"""
+
+    def __init__(self, ttls=None, max_entries=RESPONSE_CACHE_MAX_ENTRIES):
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        # LRU limit per method
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = {method: OrderedDict() for method in self.ttls}
+        # Bumped by every invalidation, per method and per (method, inventory ID), so a
+        # load that was in flight during a write doesn't cache the response from before it
+        self._generations = {}
+        self._single_flight = SingleFlight()
+        self._lock = threading.Lock()
+
+    def fetch(self, method, parameters, loader):
+        """
+        Get a response from the cache, or through loader() on a miss
+
+        Only SUCCESS responses are cached. Cached responses are shared between
+        callers and must be treated as read-only.
+        """
+        if method not in self.ttls:
+            return loader()
+
+        key = canonical_key(method, parameters)
+        with self._lock:
+            entries = self._entries[method]
+            entry = entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+            generation = self._generation(method, parameters)
+
+        # Calls made after an invalidation don't join a load that started before it
+        return self._single_flight.do(
+            (key, generation),
+            lambda: self._load(method, key, parameters, loader, generation)
+        )
+
+    def _generation(self, method, parameters):
+        """Invalidation counters covering an entry, called with the lock held"""
+        inventory_id = (parameters or {}).get("inventory_id")
+        return (
+            self._generations.get(method, 0),
+            self._generations.get((method, str(inventory_id)), 0) if inventory_id is not None else 0
+        )
+
+    def _bump(self, method, inventory_id=None):
+        """Mark every in-flight load of a method, or of one inventory, as stale; called with the lock held"""
+        bump_key = method if inventory_id is None else (method, str(inventory_id))
+        self._generations[bump_key] = self._generations.get(bump_key, 0) + 1
+
+    def _load(self, method, key, parameters, loader, generation):
+        result = loader()
+        if isinstance(result, dict) and result.get("status") == "SUCCESS":
+            with self._lock:
+                if self._generation(method, parameters) != generation:
+                    # A write was invalidated while this call was in flight
+                    return result
+                entries = self._entries[method]
+                entries[key] = (time.monotonic() + self.ttls[method], parameters or {}, result)
+                entries.move_to_end(key)
+                while len(entries) > self.max_entries:
+                    entries.popitem(last=False)
+        return result
+
+    def invalidate_write(self, method, parameters):
+        """Drop entries made stale by a write call"""
+        stale_methods = INVALIDATING_METHODS.get(method)
+        if not stale_methods:
+            return
+        parameters = parameters or {}
+        inventory_id = parameters.get("inventory_id")
+        # Single-product writes name the product, batch writes key their "products" by ID
+        if parameters.get("product_id") is not None:
+            product_ids = {str(parameters["product_id"])}
+        elif isinstance(parameters.get("products"), dict):
+            product_ids = {str(product_id) for product_id in parameters["products"]}
+        else:
+            product_ids = None
+        with self._lock:
+            for stale_method in stale_methods:
+                self._bump(stale_method, inventory_id)
+                entries = self._entries.get(stale_method)
+                if not entries:
+                    continue
+                for key, (_, cached_parameters, _) in list(entries.items()):
+                    if inventory_id is not None and str(cached_parameters.get("inventory_id")) != str(inventory_id):
+                        continue
+                    # Data entries only go stale when they hold the written product
+                    if stale_method == "getInventoryProductsData" and product_ids is not None:
+                        if product_ids.isdisjoint(str(p) for p in cached_parameters.get("products", [])):
+                            continue
+                    del entries[key]
+
+    def invalidate(self, method=None):
+        """Drop all entries of one method, or everything"""
+        with self._lock:
+            for cached_method, entries in self._entries.items():
+                if method is None or cached_method == method:
+                    self._bump(cached_method)
+                    entries.clear()
@@ -1,4 +1,5 @@
 import os
+import json
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -12,4 +13,59 @@ TOKEN = os.getenv("TOKEN", "your_token_here")
 INVENTORY_ID = 833
 TARGET_PRODUCT_ID = "12064368"
 EXTRA_FIELD_1_ID = "extra_field_483"
-EXTRA_FIELD_2_ID = "extra_field_484"
\ No newline at end of file
+EXTRA_FIELD_2_ID = "extra_field_484"
+
+# Transport settings for the Baselinker connector client
+# Baselinker allows 100 requests per minute per token
+RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", "100"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "10"))
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "30"))
+MAX_RETRIES = int(os.getenv("MAX_RETRIES", "5"))
+# JSON decoder for API responses: "json", "orjson" or "auto" (orjson when installed)
+JSON_BACKEND = os.getenv("JSON_BACKEND", "auto")
+
+# Worker threads used for concurrent chunked API calls
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "4"))
+
+# Maximum number of in-flight requests for the asyncio client
+ASYNC_MAX_CONCURRENCY = int(os.getenv("ASYNC_MAX_CONCURRENCY", "20"))
+
+# Background jobs (inventory loads, exports, bulk updates) run at once in the Streamlit app
+JOB_MAX_WORKERS = int(os.getenv("JOB_MAX_WORKERS", "2"))
+
+# Local SQLite product cache
+PRODUCT_CACHE_PATH = os.getenv("PRODUCT_CACHE_PATH", os.path.join(os.path.dirname(__file__), "products_cache.sqlite3"))
+# Seconds after which a cached inventory is synced again before it is read
+PRODUCT_CACHE_MAX_AGE = float(os.getenv("PRODUCT_CACHE_MAX_AGE", "3600"))
+
+# Pages of product change logs an incremental refresh reads before falling back to a full sync
+PRODUCT_LOG_MAX_PAGES = int(os.getenv("PRODUCT_LOG_MAX_PAGES", "50"))
+# Let the Streamlit app refresh a stale inventory from the change log. Off by default: the log
+# is read for every product at once, which Baselinker documents as unsupported
+APP_INCREMENTAL_SYNC = os.getenv("APP_INCREMENTAL_SYNC", "0") == "1"
+
+# Seconds the Streamlit app shares an in-memory inventory between sessions
+INVENTORY_CACHE_TTL = float(os.getenv("INVENTORY_CACHE_TTL", "300"))
+
+# Columns of the product table: column name -> product field, dotted for nested fields
+PRODUCT_TABLE_FIELDS = {
+    "SKU": "sku",
+    "EAN": "ean",
+    "Name": "text_fields.name",
+    "Extra Field 467": "text_fields.extra_field_467",
+    "Extra Field 484": f"text_fields.{EXTRA_FIELD_2_ID}",
+    "Description Extra 1": "text_fields.description_extra1",
+    "Description Extra 2": "text_fields.description_extra2"
+}
+if os.getenv("PRODUCT_TABLE_FIELDS"):
+    PRODUCT_TABLE_FIELDS = json.loads(os.getenv("PRODUCT_TABLE_FIELDS"))
+
+# Rows read from an uploaded import file at a time
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "5000"))
+
+# Opt-in cache of read-only connector responses
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "0") == "1"
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+
+# Inventories synced by the sync engine, comma-separated; empty discovers them via getInventories
+SYNC_INVENTORY_IDS = [int(i) for i in os.getenv("SYNC_INVENTORY_IDS", "").split(",") if i.strip()]
@@ -0,0 +1,220 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from baselinker_api import (
+    BaselinkerAPIError,
+    PRODUCTS_DATA_CHUNK_SIZE,
+    PRODUCTS_LIST_PAGE_SIZE,
+    get_inventories,
+    get_inventory_products_list,
+    get_inventory_products_data,
+    call_or_error,
+    chunked,
+    products_from_list_response
+)
+from product_store import LOG_MARK_OVERLAP, fingerprint, get_default_store
+from settings import MAX_WORKERS, SYNC_INVENTORY_IDS
+
+# Request made for each kind of task: ("list", page) or ("data", product_ids)
+TASK_REQUESTS = {
+    "list": get_inventory_products_list,
+    "data": get_inventory_products_data
+}
+
+
+class InventorySync:
+    """Progress and result of one inventory within a SyncEngine run"""
+
+    def __init__(self, inventory_id, weight=1.0):
+        self.inventory_id = inventory_id
+        # Share of the request budget relative to the other inventories
+        self.weight = weight
+        self.status = "PENDING"
+        self.pages = 0
+        self.chunks_total = 0
+        self.chunks_done = 0
+        self.products_listed = 0
+        self.changed = 0
+        self.products_fetched = 0
+        self.requests = 0
+        self.fingerprints = {}
+        self.products = {}
+        self.deleted = []
+        self.failed_chunks = []
+        self.error = None
+        self.result = None
+        self.started_at = None
+        self.finished_at = None
+        # Change log high-water mark recorded if the sync completes without failures
+        self.log_mark = None
+        self.ready = deque()
+
+    def progress(self):
+        """Snapshot of where this inventory's sync stands"""
+        end = self.finished_at or time.monotonic()
+        return {
+            "status": self.status,
+            "pages": self.pages,
+            "products_listed": self.products_listed,
+            "chunks_done": self.chunks_done,
+            "chunks_total": self.chunks_total,
+            "products_fetched": self.products_fetched,
+            "failed_chunks": len(self.failed_chunks),
+            "requests": self.requests,
+            "seconds": end - self.started_at if self.started_at else 0.0
+        }
+
+
+class SyncEngine:
+    """
+    Sync several inventories into the product store in parallel under one request budget
+
+    Every inventory's work is split into requests (list pages, then data
+    chunks for new or changed products). A bounded worker pool runs them,
+    always picking the inventory that has used the least of its weighted
+    share so far, so small catalogs are not starved by large ones. All
+    requests go through the shared client and its rate limiter.
+    """
+
+    def __init__(self, store=None, max_workers=MAX_WORKERS, chunk_size=PRODUCTS_DATA_CHUNK_SIZE):
+        self.store = store or get_default_store()
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.jobs = {}
+
+    def discover(self):
+        """Get the IDs of all inventories of the account"""
+        response = get_inventories()
+        if response.get("status") != "SUCCESS":
+            raise BaselinkerAPIError("getInventories", response)
+        return [int(inventory["inventory_id"]) for inventory in response.get("inventories", [])]
+
+    def progress(self):
+        """Per-inventory progress of the current or last run"""
+        return {inventory_id: job.progress() for inventory_id, job in self.jobs.items()}
+
+    def run(self, inventory_ids=None, priorities=None, progress=None):
+        """
+        Sync inventories and return their results
+
+        Args:
+            inventory_ids (list, optional): Inventories to sync. Defaults to
+                settings.SYNC_INVENTORY_IDS, or every inventory of the account if empty.
+            priorities (dict, optional): Inventory ID to weight; an inventory with
+                weight 2 gets twice the requests of one with weight 1 while both have work.
+            progress (callable, optional): Called with progress() after every request
+
+        Returns:
+            dict: Inventory ID to {"status", "added", "updated", "deleted",
+            "unchanged", "failed_chunks", "error", "requests", "seconds"}
+        """
+        if inventory_ids is None:
+            inventory_ids = SYNC_INVENTORY_IDS or self.discover()
+        priorities = priorities or {}
+
+        self.jobs = {}
+        for inventory_id in inventory_ids:
+            job = InventorySync(inventory_id, priorities.get(inventory_id, 1.0))
+            job.status = "LISTING"
+            job.started_at = time.monotonic()
+            job.log_mark = time.time() - LOG_MARK_OVERLAP
+            job.ready.append(("list", 1))
+            self.jobs[inventory_id] = job
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {}
+            while True:
+                while len(pending) < self.max_workers:
+                    job = self._next_job()
+                    if job is None:
+                        break
+                    task = job.ready.popleft()
+                    job.requests += 1
+                    kind, argument = task
+                    future = executor.submit(call_or_error, TASK_REQUESTS[kind], job.inventory_id, argument)
+                    pending[future] = (job, task)
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job, task = pending.pop(future)
+                    self._handle(job, task, future.result())
+                    if progress is not None:
+                        progress(self.progress())
+
+        return {inventory_id: job.result for inventory_id, job in self.jobs.items()}
+
+    def _next_job(self):
+        """Pick the inventory with ready work that is furthest below its weighted share"""
+        candidates = [job for job in self.jobs.values() if job.ready]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda job: job.requests / job.weight)
+
+    def _handle(self, job, task, response):
+        """Fold one finished request into its inventory and queue the follow-up work"""
+        kind, argument = task
+        if kind == "list":
+            if response.get("status") != "SUCCESS":
+                job.error = response
+                self._finish(job)
+                return
+
+            products = products_from_list_response(response)
+            job.pages += 1
+            for product_id, list_product in products:
+                job.fingerprints[product_id] = fingerprint(list_product)
+            job.products_listed = len(job.fingerprints)
+            if len(products) >= PRODUCTS_LIST_PAGE_SIZE:
+                job.ready.append(("list", argument + 1))
+                return
+
+            # The list is complete, fetch only what changed
+            changed, job.deleted = self.store.diff(job.inventory_id, job.fingerprints)
+            job.changed = len(changed)
+            chunks = chunked(changed, self.chunk_size)
+            job.chunks_total = len(chunks)
+            job.ready.extend(("data", chunk) for chunk in chunks)
+            job.status = "FETCHING"
+            if not chunks:
+                self._finish(job)
+            return
+
+        job.chunks_done += 1
+        if response.get("status") == "SUCCESS":
+            job.products.update(response.get("products") or {})
+            job.products_fetched = len(job.products)
+        else:
+            job.failed_chunks.append({"product_ids": argument, "error": response})
+        if job.chunks_done == job.chunks_total:
+            self._finish(job)
+
+    def _finish(self, job):
+        """Save a finished inventory and release its working data"""
+        job.finished_at = time.monotonic()
+        if job.error is not None:
+            job.status = "ERROR"
+            job.result = {"status": "ERROR", "error": job.error}
+        else:
+            result = self.store.save(job.inventory_id, job.fingerprints, job.products, job.deleted)
+            self.store.set_log_mark(job.inventory_id, None if job.failed_chunks else job.log_mark)
+            if not job.failed_chunks:
+                job.status = "SUCCESS"
+            elif job.products:
+                job.status = "PARTIAL"
+            else:
+                job.status = "ERROR"
+            result.update({
+                "status": job.status,
+                "unchanged": job.products_listed - job.changed,
+                "failed_chunks": job.failed_chunks,
+                "error": None
+            })
+            job.result = result
+        job.result.update({"requests": job.requests, "seconds": job.finished_at - job.started_at})
+
+        job.fingerprints = {}
+        job.products = {}
+        job.deleted = []